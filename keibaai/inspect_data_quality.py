@@ -1,12 +1,22 @@
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+import io
 import sys
 
 # プロジェクトルートの設定
 project_root = Path(__file__).resolve().parent
 sys.path.append(str(project_root))
 
+# 結合確認で使うキー列
+MERGE_KEY_COLUMNS = ['race_id', 'horse_id']
+
 def inspect_parquet(file_path, name):
     print(f"\n{'='*20} Inspecting {name} {'='*20}")
     print(f"Path: {file_path}")
@@ -15,74 +25,94 @@ def inspect_parquet(file_path, name):
         print(f"❌ File not found: {file_path}")
         return None
 
+    # pandasに変換せずArrowのまま集計し、表示するサンプルだけpandasにする
     try:
-        df = pd.read_parquet(file_path)
-    except Exception as e:
+        table = pq.read_table(file_path)
+    except (OSError, pa.ArrowInvalid) as e:
         print(f"❌ Failed to read parquet: {e}")
         return None
         
-    print(f"Shape: {df.shape}")
-    print(f"Columns: {df.columns.tolist()}")
+    print(f"Shape: {table.shape}")
+    print(f"Columns: {table.column_names}")
     
-    # 基本統計と欠損値
+    # 基本統計と欠損値 (null_countはArrow配列が保持しているので走査不要)
     print("\n--- Missing Values ---")
-    missing = df.isnull().sum()
+    missing = pd.Series({col: table.column(col).null_count for col in table.column_names})
     print(missing[missing > 0])
     
     # 重複確認
     print("\n--- Duplicates ---")
-    if 'race_id' in df.columns and 'horse_id' in df.columns:
+    if 'race_id' in table.column_names and 'horse_id' in table.column_names:
         dup_subset = ['race_id', 'horse_id']
-        dups = df.duplicated(subset=dup_subset).sum()
+        key_counts = table.group_by(dup_subset).aggregate([([], 'count_all')])
+        counts = key_counts.column('count_all')
+        dups = pc.sum(pc.subtract(counts, 1)).as_py() or 0
         print(f"Duplicates (race_id, horse_id): {dups}")
         if dups > 0:
             print("Sample duplicates:")
-            print(df[df.duplicated(subset=dup_subset, keep=False)].sort_values(by=dup_subset).head(4))
+            dup_keys = key_counts.filter(pc.greater(counts, 1)).select(dup_subset)
+            sample = table.join(dup_keys, keys=dup_subset, join_type='inner')
+            print(sample.to_pandas().sort_values(by=dup_subset).head(4))
     
     # IDフォーマット確認
     print("\n--- ID Formats ---")
-    if 'race_id' in df.columns:
-        print(f"race_id dtype: {df['race_id'].dtype}")
-        print(f"race_id sample: {df['race_id'].head(3).tolist()}")
+    if 'race_id' in table.column_names:
+        race_id_type = table.schema.field('race_id').type
+        print(f"race_id dtype: {race_id_type}")
+        print(f"race_id sample: {table.column('race_id').slice(0, 3).to_pylist()}")
         # 文字列長や形式の確認
-        if df['race_id'].dtype == 'object':
-             lens = df['race_id'].astype(str).map(len).unique()
+        if pa.types.is_string(race_id_type) or pa.types.is_large_string(race_id_type):
+             lens = np.unique(pc.utf8_length(table.column('race_id')).drop_null().to_numpy())
              print(f"race_id lengths: {lens}")
 
-    if 'horse_id' in df.columns:
-        print(f"horse_id dtype: {df['horse_id'].dtype}")
-        print(f"horse_id sample: {df['horse_id'].head(3).tolist()}")
+    if 'horse_id' in table.column_names:
+        print(f"horse_id dtype: {table.schema.field('horse_id').type}")
+        print(f"horse_id sample: {table.column('horse_id').slice(0, 3).to_pylist()}")
     
-    if 'horse_number' in df.columns:
+    if 'horse_number' in table.column_names:
         print("\n--- Horse Numbers ---")
-        print(f"horse_number unique values: {sorted(df['horse_number'].unique())}")
-        zeros = (df['horse_number'] == 0).sum()
-        print(f"Count of horse_number == 0: {zeros} ({zeros/len(df):.2%})")
+        horse_number = table.column('horse_number')
+        print(f"horse_number unique values: {sorted(pc.unique(horse_number).to_pylist(), key=lambda v: (v is None, v))}")
+        zeros = pc.sum(pc.equal(horse_number, 0)).as_py() or 0
+        if table.num_rows:
+            print(f"Count of horse_number == 0: {zeros} ({zeros/table.num_rows:.2%})")
+        else:
+            # 空ファイルでは割合を計算できない (ワーカーごとスクリプトが落ちないようにする)
+            print(f"Count of horse_number == 0: {zeros}")
+
+    return table
 
-    return df
+def _inspect_worker(file_path, name):
+    """
+    別プロセスで inspect_parquet を実行し、出力文字列と結合確認用のキー列を返す
+    (並列実行時に出力が混ざらないよう、printはバッファに溜める)
+    """
+    buf = io.StringIO()
+    with redirect_stdout(buf):
+        table = inspect_parquet(file_path, name)
+    if table is not None:
+        # 親プロセスへ送るのは結合確認に使うキー列だけにする
+        table = table.select([c for c in MERGE_KEY_COLUMNS if c in table.column_names])
+    return buf.getvalue(), table
 
 def main():
     base_dir = Path("data")
     
     # 1. 予測結果データ (出力)
     pred_path = base_dir / "predictions/parquet/predictions_2024_full.parquet"
-    pred_df = inspect_parquet(pred_path, "Predictions (Output)")
     
     # 2. 特徴量データ (入力1)
-    # features_2024.parquet があると仮定、なければ features ディレクトリを探す
-    features_dir = base_dir / "features/parquet/year=2024"
+    # features/parquet を hive パーティションとして扱い、year=2024 の最初のファイルを使う
+    features_root = base_dir / "features/parquet"
     features_path = None
-    if features_dir.exists():
-        # 最初のparquetファイルを取得
-        for p in features_dir.glob("**/*.parquet"):
-            features_path = p
-            break
-    
-    if features_path:
-        features_df = inspect_parquet(features_path, "Features 2024 (Input Sample)")
-    else:
-        print("❌ Features 2024 not found")
-        features_df = None
+    if features_root.exists():
+        # ファイル本体は開かずに、パーティションのパスとメタデータだけで探索する
+        features_ds = ds.dataset(str(features_root), format="parquet", partitioning="hive")
+        year_filter = ds.field("year") == 2024
+        fragment = next(features_ds.get_fragments(filter=year_filter), None)
+        if fragment is not None:
+            features_path = Path(fragment.path)
+            features_rows = features_ds.count_rows(filter=year_filter)
     
     # 3. 出馬表データ (入力2)
     shutuba_path = base_dir / "parsed/parquet/shutuba/shutuba.parquet"
@@ -90,11 +120,32 @@ def main():
          # バックアップ等があるかもしれないので親ディレクトリも確認
          shutuba_path = base_dir / "parsed/parquet/shutuba.parquet"
     
-    shutuba_df = inspect_parquet(shutuba_path, "Shutuba (Source)")
+    targets = {"Predictions (Output)": pred_path}
+    if features_path:
+        targets["Features 2024 (Input Sample)"] = features_path
+    targets["Shutuba (Source)"] = shutuba_path
+
+    # 3ファイルは互いに独立しているため、プロセスを分けて並列に読み込む
+    with ProcessPoolExecutor(max_workers=len(targets)) as executor:
+        futures = {name: executor.submit(_inspect_worker, path, name) for name, path in targets.items()}
+        results = {name: future.result() for name, future in futures.items()}
+
+    for name, (output, _) in results.items():
+        print(output, end="")
+        if name == "Features 2024 (Input Sample)":
+            print(f"Features 2024 rows (all files): {features_rows}")
+        if name == "Predictions (Output)" and not features_path:
+            print("❌ Features 2024 not found")
+
+    pred_df = results["Predictions (Output)"][1]
+    shutuba_df = results["Shutuba (Source)"][1]
     
     # 結合テスト
     if pred_df is not None and shutuba_df is not None:
         print(f"\n{'='*20} Merge Analysis {'='*20}")
+
+        pred_df = pred_df.to_pandas()
+        shutuba_df = shutuba_df.to_pandas()
         
         # 型合わせ
         p_race_id_dtype = pred_df['race_id'].dtype
@@ -106,8 +157,9 @@ def main():
         print(f"horse_id dtypes: Pred={p_horse_id_dtype}, Shutuba={s_horse_id_dtype}")
         
         # 共通のIDを確認
-        p_races = set(pred_df['race_id'].astype(str))
-        s_races = set(shutuba_df['race_id'].astype(str))
+        # Pythonのsetを作らず、pandasのハッシュ結合で共通部分を求める
+        p_races = pd.Index(pred_df['race_id'].astype('string')).unique()
+        s_races = pd.Index(shutuba_df['race_id'].astype('string')).unique()
         common_races = p_races.intersection(s_races)
         print(f"Common race_ids: {len(common_races)} (Pred: {len(p_races)}, Shutuba: {len(s_races)})")
         
@@ -117,11 +169,11 @@ def main():
             print(f"Shutuba sample: {list(s_races)[:3]}")
         else:
             # 共通レースでの結合率
-            sample_race = list(common_races)[0]
+            sample_race = common_races[0]
             print(f"Testing merge on race_id: {sample_race}")
             
-            p_subset = pred_df[pred_df['race_id'].astype(str) == sample_race].copy()
-            s_subset = shutuba_df[shutuba_df['race_id'].astype(str) == sample_race].copy()
+            p_subset = pred_df[pred_df['race_id'].astype('string') == sample_race].copy()
+            s_subset = shutuba_df[shutuba_df['race_id'].astype('string') == sample_race].copy()
             
             print(f"Pred subset shape: {p_subset.shape}")
             print(f"Shutuba subset shape: {s_subset.shape}")
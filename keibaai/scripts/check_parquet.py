@@ -1,7 +1,18 @@
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 import argparse
+import codecs
 from pathlib import Path
 
+try:
+    from charset_normalizer import from_bytes
+except ImportError:
+    from_bytes = None
+
+CSV_ENCODINGS = ('shift-jis', 'utf-8', 'cp932')
+
 def check_parquet_file(file_path: Path):
     """
     指定されたParquetファイルの中身を確認する
@@ -12,29 +23,80 @@ def check_parquet_file(file_path: Path):
         return
 
     try:
-        df = pd.read_parquet(file_path)
-        print(f"Shape: {df.shape}")
-        print("\nInfo:")
-        df.info()
+        # 全体を読み込まず、メタデータと必要な行グループ・列だけを読む
+        pf = pq.ParquetFile(file_path)
+        num_rows = pf.metadata.num_rows
+        columns = pf.schema_arrow.names
+        print(f"Shape: ({num_rows}, {len(columns)})")
+        print("\nSchema:")
+        print(pf.schema_arrow.remove_metadata())
         print("\nColumns:")
-        print(df.columns.tolist())
+        print(columns)
         print("\nHead (first 5 rows):")
-        print(df.head(5).to_string())
+        print(_read_edge_rows(pf, 5, from_end=False).to_pandas().to_string())
         print("\nTail (last 5 rows):")
-        print(df.tail(5).to_string())
+        tail_df = _read_edge_rows(pf, 5, from_end=True).to_pandas()
+        tail_df.index = range(num_rows - len(tail_df), num_rows)
+        print(tail_df.to_string())
         
         # is_jockey_changed と is_trainer_changed の値を確認
-        if 'is_jockey_changed' in df.columns:
-            print("\nValue counts for 'is_jockey_changed':")
-            print(df['is_jockey_changed'].value_counts())
-        
-        if 'is_trainer_changed' in df.columns:
-            print("\nValue counts for 'is_trainer_changed':")
-            print(df['is_trainer_changed'].value_counts())
+        for col in ('is_jockey_changed', 'is_trainer_changed'):
+            if col in columns:
+                print(f"\nValue counts for '{col}':")
+                # pandas の value_counts と同じく欠損値は数えない
+                counts = pc.value_counts(pc.drop_null(pf.read(columns=[col]).column(0)))
+                print(pd.Series(
+                    counts.field('counts').to_pylist(),
+                    index=pd.Index(counts.field('values').to_pylist(), name=col),
+                    name='count',
+                ).sort_values(ascending=False))
 
     except Exception as e:
         print(f"ファイルの読み込み中にエラーが発生しました: {e}")
 
+def _read_edge_rows(pf: pq.ParquetFile, n: int, from_end: bool) -> pa.Table:
+    """
+    先頭または末尾の行グループから n 行だけを読み込む
+    """
+    indices = range(pf.num_row_groups)
+    if from_end:
+        indices = reversed(indices)
+
+    tables = []
+    rows = 0
+    for i in indices:
+        table = pf.read_row_group(i)
+        tables.append(table)
+        rows += table.num_rows
+        if rows >= n:
+            break
+
+    if not tables:
+        return pf.schema_arrow.empty_table()
+    if from_end:
+        tables.reverse()
+        table = pa.concat_tables(tables)
+        return table.slice(max(table.num_rows - n, 0))
+    return pa.concat_tables(tables).slice(0, n)
+
+def _detect_encoding(file_path: Path, sniff_bytes: int = 65536):
+    """
+    ファイル先頭のBOMまたはcharset_normalizerでエンコーディングを推定する
+    """
+    with open(file_path, 'rb') as f:
+        head = f.read(sniff_bytes)
+
+    if head.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+
+    if from_bytes is None:
+        return None
+    # 誤判定を避けるため、候補はこれまで試していたエンコーディングに限定する
+    best = from_bytes(head, cp_isolation=list(CSV_ENCODINGS)).best()
+    return best.encoding if best is not None else None
+
 def check_csv_file(file_path: Path):
     """
     指定されたCSVファイルの中身を確認する
@@ -44,7 +106,10 @@ def check_csv_file(file_path: Path):
         print("ファイルが見つかりません。")
         return
 
-    encodings_to_try = ['shift-jis', 'utf-8', 'cp932']
+    # 先頭だけを見てエンコーディングを推定し、まずそれで読む (失敗時は従来の候補を順に試す)
+    detected = _detect_encoding(file_path)
+    encodings_to_try = [detected] if detected else []
+    encodings_to_try += [e for e in CSV_ENCODINGS if e != detected]
     df = None
     for encoding in encodings_to_try:
         try:
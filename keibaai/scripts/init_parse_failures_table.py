@@ -16,6 +16,35 @@ import sys
 project_root = Path(__file__).resolve().parent.parent.parent
 sys.path.append(str(project_root))
 
+SETUP_PRAGMAS_SQL = """
+PRAGMA page_size = 8192;
+PRAGMA journal_mode = WAL;
+PRAGMA synchronous = NORMAL;
+PRAGMA temp_store = MEMORY;
+"""
+
+CREATE_PARSE_FAILURES_SQL = """
+BEGIN;
+
+CREATE TABLE parse_failures (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    parser_name TEXT NOT NULL,
+    source_file TEXT NOT NULL,
+    error_type TEXT,
+    error_message TEXT,
+    stack_trace TEXT,
+    failed_ts TEXT NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+-- インデックス作成
+CREATE INDEX idx_parse_failures_parser ON parse_failures(parser_name);
+CREATE INDEX idx_parse_failures_source ON parse_failures(source_file);
+CREATE INDEX idx_parse_failures_ts ON parse_failures(failed_ts);
+
+COMMIT;
+"""
+
 def create_parse_failures_table(db_path: str):
     """
     parse_failuresテーブルを作成する
@@ -36,6 +65,9 @@ def create_parse_failures_table(db_path: str):
     cursor = conn.cursor()
 
     try:
+        # セットアップ中の fsync を減らす (page_size は新規DBにのみ反映される)
+        conn.executescript(SETUP_PRAGMAS_SQL)
+
         # テーブルが既に存在するか確認
         cursor.execute("""
             SELECT name FROM sqlite_master
@@ -52,38 +84,10 @@ def create_parse_failures_table(db_path: str):
             for col in columns:
                 logger.info(f"  {col[1]} ({col[2]})")
         else:
-            # テーブル作成
+            # テーブル作成 (テーブルとインデックスを1トランザクションでまとめて作成)
             logger.info("parse_failuresテーブルを作成中...")
-            cursor.execute("""
-                CREATE TABLE parse_failures (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    parser_name TEXT NOT NULL,
-                    source_file TEXT NOT NULL,
-                    error_type TEXT,
-                    error_message TEXT,
-                    stack_trace TEXT,
-                    failed_ts TEXT NOT NULL,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-
-            # インデックス作成
-            cursor.execute("""
-                CREATE INDEX idx_parse_failures_parser
-                ON parse_failures(parser_name)
-            """)
-
-            cursor.execute("""
-                CREATE INDEX idx_parse_failures_source
-                ON parse_failures(source_file)
-            """)
-
-            cursor.execute("""
-                CREATE INDEX idx_parse_failures_ts
-                ON parse_failures(failed_ts)
-            """)
-
-            conn.commit()
+            conn.executescript(CREATE_PARSE_FAILURES_SQL)
+
             logger.info("✓ parse_failuresテーブルを作成しました")
             logger.info("✓ インデックスを作成しました")
 
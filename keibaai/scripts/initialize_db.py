@@ -1,106 +1,201 @@
 import sqlite3
 import os
+from itertools import islice
 from pathlib import Path
 
-def initialize_database():
+# DBファイルに保存される (永続的な) PRAGMA
+# page_size は新規DBにのみ反映されるため、WAL切り替えより前に設定する
+# synchronous などの接続単位の設定は pipeline_core.get_db_connection で接続ごとに行う
+SQLITE_PRAGMAS = (
+    "page_size=8192",
+    "journal_mode=WAL",
+)
+
+# (インデックス名, 対象テーブル(カラム))
+INDEXES = (
+    ('idx_fetch_log_url', 'fetch_log(url)'),
+    ('idx_fetch_log_sha256', 'fetch_log(sha256)'),
+    ('idx_fetch_log_fetched_ts', 'fetch_log(fetched_ts)'),
+    ('idx_model_metadata_created_ts', 'model_metadata(created_ts)'),
+    ('idx_model_metadata_model_type', 'model_metadata(model_type)'),
+    ('idx_data_versions_table_name', 'data_versions(table_name)'),
+    ('idx_data_versions_created_ts', 'data_versions(created_ts)'),
+    ('idx_parse_failures_parser_name', 'parse_failures(parser_name)'),
+    ('idx_parse_failures_race_id', 'parse_failures(race_id)'),
+    ('idx_parse_failures_resolved', 'parse_failures(resolved)'),
+    ('idx_parse_failures_failed_ts', 'parse_failures(failed_ts)'),
+)
+
+TABLES_SQL = """
+-- fetch_log テーブル
+CREATE TABLE IF NOT EXISTS fetch_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    fetched_ts TEXT NOT NULL,  -- ISO8601+09:00
+    sha256 TEXT NOT NULL,
+    file_size INTEGER NOT NULL,
+    fetch_method TEXT NOT NULL,  -- 'requests' or 'selenium'
+    http_status INTEGER,
+    error_message TEXT,
+    UNIQUE(url, fetched_ts)
+);
+
+-- model_metadata テーブル
+-- 主キーがTEXTで一意なため WITHOUT ROWID とし、よく参照する列を主キーの近くに置く
+CREATE TABLE IF NOT EXISTS model_metadata (
+    model_id TEXT PRIMARY KEY,
+    model_type TEXT NOT NULL,  -- 'mu_regressor', 'mu_ranker', 'sigma', 'nu'
+    created_ts TEXT NOT NULL,        -- ISO8601+09:00
+    commit_hash TEXT NOT NULL,
+    training_start TEXT NOT NULL,  -- ISO8601+09:00
+    training_end TEXT NOT NULL,    -- ISO8601+09:00
+    hyperparams TEXT NOT NULL,     -- JSON
+    calibration_method TEXT,
+    data_version TEXT NOT NULL,
+    random_seed INTEGER NOT NULL,
+    library_versions TEXT NOT NULL,  -- JSON
+    performance_metrics TEXT,        -- JSON
+    notes TEXT
+) WITHOUT ROWID;
+
+-- data_versions テーブル (model_metadata と同様に WITHOUT ROWID)
+CREATE TABLE IF NOT EXISTS data_versions (
+    version_id TEXT PRIMARY KEY,
+    table_name TEXT NOT NULL,
+    created_ts TEXT NOT NULL,  -- ISO8601+09:00
+    schema_version TEXT NOT NULL,
+    record_count INTEGER NOT NULL,
+    start_date TEXT NOT NULL,  -- ISO8601+09:00
+    end_date TEXT NOT NULL,    -- ISO8601+09:00
+    file_paths TEXT NOT NULL,  -- JSON array
+    sha256_manifest TEXT NOT NULL,  -- JSON: {file_path: sha256}
+    notes TEXT
+) WITHOUT ROWID;
+
+-- parse_failures テーブル
+CREATE TABLE IF NOT EXISTS parse_failures (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    parser_name TEXT NOT NULL,
+    source_file TEXT NOT NULL,
+    race_id TEXT,
+    horse_id TEXT,
+    error_type TEXT NOT NULL,
+    error_message TEXT,
+    stack_trace TEXT,
+    failed_ts TEXT NOT NULL,  -- ISO8601+09:00
+    retry_count INTEGER DEFAULT 0,
+    resolved BOOLEAN DEFAULT 0,
+    resolved_ts TEXT,
+    notes TEXT
+);
+"""
+
+
+INDEXES_SQL = "\n".join(
+    f"CREATE INDEX IF NOT EXISTS {index_name} ON {target};" for index_name, target in INDEXES
+)
+
+SCHEMA_SQL = TABLES_SQL + "\n" + INDEXES_SQL
+
+def get_db_path() -> Path:
     """
-    仕様書で定義されたスキーマに基づいてSQLiteデータベースを初期化する
+    メタデータDBのパスを返す
     """
     # スクリプトの場所を基準にプロジェクトルート（keibaaiディレクトリ）を決定
     project_root = Path(__file__).resolve().parent.parent
-    db_path = project_root / 'data' / 'metadata' / 'db.sqlite3'
+    return project_root / 'data' / 'metadata' / 'db.sqlite3'
+
+def create_tables(conn: sqlite3.Connection):
+    """
+    テーブルのみを作成する (インデックスは create_indexes で作成)
+    """
+    conn.executescript("BEGIN;\n" + TABLES_SQL + "\nCOMMIT;")
+
+def create_indexes(conn: sqlite3.Connection):
+    """
+    インデックスを作成する
+
+    大量投入の前に作成するとINSERT毎にB-treeの更新が走るため、
+    バックフィル時は投入完了後に呼び出す
+    """
+    conn.executescript("BEGIN;\n" + INDEXES_SQL + "\nCOMMIT;")
+
+def drop_indexes(conn: sqlite3.Connection):
+    """
+    create_indexes で作成するインデックスを削除する (バックフィル前に使用)
+    """
+    drop_sql = "\n".join(f"DROP INDEX IF EXISTS {index_name};" for index_name, _ in INDEXES)
+    conn.executescript("BEGIN;\n" + drop_sql + "\nCOMMIT;")
+
+def bulk_insert(conn: sqlite3.Connection, table: str, columns, rows, chunk: int = 10000) -> int:
+    """
+    複数行をまとめて1トランザクションで挿入する
+
+    fetch_log / parse_failures へ1行ずつ INSERT + commit すると行ごとに
+    fsync が発生するため、呼び出し側で行を溜めてからこの関数でまとめて書き込む。
+
+    Args:
+        conn: SQLite接続
+        table: 挿入先テーブル名
+        columns: 挿入するカラム名のリスト
+        rows: 各行の値のタプル (イテラブル可)
+        chunk: executemany 1回あたりの行数
+
+    Returns:
+        int: 挿入した行数
+    """
+    stmt = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    rows = iter(rows)
+    inserted = 0
+    # 呼び出し側で既にトランザクションが開いていても使えるよう、BEGIN ではなく SAVEPOINT を使う
+    # (トランザクション外なら RELEASE でコミットされ、内側なら呼び出し側のトランザクションに含まれる)
+    conn.execute("SAVEPOINT bulk_insert")
+    try:
+        while True:
+            batch = list(islice(rows, chunk))
+            if not batch:
+                break
+            conn.executemany(stmt, batch)
+            inserted += len(batch)
+    except Exception:
+        conn.execute("ROLLBACK TO SAVEPOINT bulk_insert")
+        conn.execute("RELEASE SAVEPOINT bulk_insert")
+        raise
+    conn.execute("RELEASE SAVEPOINT bulk_insert")
+    return inserted
+
+def initialize_database(with_indexes: bool = True) -> Path:
+    """
+    仕様書で定義されたスキーマに基づいてSQLiteデータベースを初期化する
+
+    Args:
+        with_indexes: Falseの場合はテーブルのみ作成し、インデックス作成を後回しにする
+
+    Returns:
+        Path: データベースファイルのパス
+    """
+    db_path = get_db_path()
     
     # ディレクトリが存在しない場合は作成
     db_path.parent.mkdir(parents=True, exist_ok=True)
     
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
-    
-    # fetch_log テーブル
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS fetch_log (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        url TEXT NOT NULL,
-        file_path TEXT NOT NULL,
-        fetched_ts TEXT NOT NULL,  -- ISO8601+09:00
-        sha256 TEXT NOT NULL,
-        file_size INTEGER NOT NULL,
-        fetch_method TEXT NOT NULL,  -- 'requests' or 'selenium'
-        http_status INTEGER,
-        error_message TEXT,
-        UNIQUE(url, fetched_ts)
-    );
-    ''')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_fetch_log_url ON fetch_log(url);')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_fetch_log_sha256 ON fetch_log(sha256);')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_fetch_log_fetched_ts ON fetch_log(fetched_ts);')
-
-    # model_metadata テーブル
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS model_metadata (
-        model_id TEXT PRIMARY KEY,
-        model_type TEXT NOT NULL,  -- 'mu_regressor', 'mu_ranker', 'sigma', 'nu'
-        commit_hash TEXT NOT NULL,
-        training_start TEXT NOT NULL,  -- ISO8601+09:00
-        training_end TEXT NOT NULL,    -- ISO8601+09:00
-        hyperparams TEXT NOT NULL,     -- JSON
-        calibration_method TEXT,
-        data_version TEXT NOT NULL,
-        random_seed INTEGER NOT NULL,
-        library_versions TEXT NOT NULL,  -- JSON
-        performance_metrics TEXT,        -- JSON
-        created_ts TEXT NOT NULL,        -- ISO8601+09:00
-        notes TEXT
-    );
-    ''')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_model_metadata_created_ts ON model_metadata(created_ts);')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_model_metadata_model_type ON model_metadata(model_type);')
-
-    # data_versions テーブル
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS data_versions (
-        version_id TEXT PRIMARY KEY,
-        table_name TEXT NOT NULL,
-        schema_version TEXT NOT NULL,
-        record_count INTEGER NOT NULL,
-        start_date TEXT NOT NULL,  -- ISO8601+09:00
-        end_date TEXT NOT NULL,    -- ISO8601+09:00
-        file_paths TEXT NOT NULL,  -- JSON array
-        created_ts TEXT NOT NULL,  -- ISO8601+09:00
-        sha256_manifest TEXT NOT NULL,  -- JSON: {file_path: sha256}
-        notes TEXT
-    );
-    ''')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_data_versions_table_name ON data_versions(table_name);')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_data_versions_created_ts ON data_versions(created_ts);')
-
-    # parse_failures テーブル
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS parse_failures (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        parser_name TEXT NOT NULL,
-        source_file TEXT NOT NULL,
-        race_id TEXT,
-        horse_id TEXT,
-        error_type TEXT NOT NULL,
-        error_message TEXT,
-        stack_trace TEXT,
-        failed_ts TEXT NOT NULL,  -- ISO8601+09:00
-        retry_count INTEGER DEFAULT 0,
-        resolved BOOLEAN DEFAULT 0,
-        resolved_ts TEXT,
-        notes TEXT
-    );
-    ''')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_parse_failures_parser_name ON parse_failures(parser_name);')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_parse_failures_race_id ON parse_failures(race_id);')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_parse_failures_resolved ON parse_failures(resolved);')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_parse_failures_failed_ts ON parse_failures(failed_ts);')
-
-    conn.commit()
+
+    # WAL で読み取りをブロックしない (以降の接続にも引き継がれる)
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(f"PRAGMA {pragma}")
+    journal_mode = cursor.execute("PRAGMA journal_mode").fetchone()[0]
+    if journal_mode.lower() != 'wal':
+        print(f"警告: WALモードを有効化できませんでした (journal_mode={journal_mode})")
+
+    # DDLはまとめて1回の executescript (1トランザクション) で実行する
+    conn.executescript("BEGIN;\n" + (SCHEMA_SQL if with_indexes else TABLES_SQL) + "\nCOMMIT;")
     conn.close()
     
     print(f"データベース '{db_path}' が正常に初期化されました。")
+    return db_path
 
 if __name__ == '__main__':
     initialize_database()
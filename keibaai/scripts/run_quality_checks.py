@@ -10,7 +10,7 @@
 import argparse
 import logging
 import sys
-import yaml
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
@@ -19,7 +19,7 @@ project_root = Path(__file__).resolve().parent.parent.parent
 sys.path.append(str(project_root))
 
 try:
-    from keibaai.src.pipeline_core import setup_logging
+    from keibaai.src.pipeline_core import setup_logging, load_config_cached
     from keibaai.src.modules.validation.validation_pipeline import ValidationPipeline
     from keibaai.src.modules.monitoring.monitoring_local import MonitoringSystem
     from keibaai.src.modules.monitoring.model_analyzer import ModelAnalyzer
@@ -29,6 +29,38 @@ except ImportError as e:
     sys.exit(1)
 
 
+def load_normalized_config(config_path: Path) -> dict:
+    """
+    設定を読み込み、パスを正規化して返す
+
+    YAMLのパースは load_config_cached のキャッシュを使い、パスの置換はメモリ上で行う。
+    """
+    config = load_config_cached(config_path)
+    data_path = str(project_root / config.get('data_path', 'keibaai/data'))
+
+    # パスの正規化
+    for key, value in config.items():
+        if isinstance(value, str):
+            if '${data_path}' in value:
+                value = value.replace('${data_path}', data_path)
+            if key.endswith('_path') and not Path(value).is_absolute():
+                value = str(project_root / value)
+            config[key] = value
+
+    return config
+
+
+def read_parquet_columns(path: Path, columns: list):
+    """
+    Parquetから指定カラムのうち存在するものだけを読み込む
+    """
+    import pandas as pd
+    import pyarrow.parquet as pq
+
+    available = set(pq.read_schema(path).names)
+    return pd.read_parquet(path, columns=[c for c in columns if c in available], engine='pyarrow')
+
+
 def main():
     """メイン実行関数"""
     parser = argparse.ArgumentParser(
@@ -135,18 +167,11 @@ def main():
         if not config_path.is_absolute():
             config_path = project_root / config_path
 
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = yaml.safe_load(f)
+        config = load_normalized_config(config_path)
 
+        # data_path は正規化済み (絶対パス) のため、project_root との結合はそのまま返る
         data_path = project_root / config.get('data_path', 'keibaai/data')
 
-        # パスの正規化
-        for key, value in config.items():
-            if isinstance(value, str):
-                config[key] = value.replace('${data_path}', str(data_path))
-            if key.endswith('_path') and not Path(config[key]).is_absolute():
-                config[key] = str(project_root / config[key])
-
         # ロギングの設定
         log_conf = config.get('logging', {})
         now = datetime.now()
@@ -287,9 +312,15 @@ def main():
                 if not actuals_path.is_absolute():
                     actuals_path = project_root / actuals_path
 
-                # データの読み込み
-                predictions_df = pd.read_parquet(predictions_path)
-                actuals_df = pd.read_parquet(actuals_path)
+                # データの読み込み (互いに独立したファイルなので並列に読む)
+                # 分析で使うカラムだけを読み込む
+                prediction_cols = ModelAnalyzer.REQUIRED_PREDICTION_COLS + ModelAnalyzer.OPTIONAL_COLS
+                actual_cols = ModelAnalyzer.REQUIRED_ACTUAL_COLS + ModelAnalyzer.OPTIONAL_COLS
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    predictions_future = executor.submit(read_parquet_columns, predictions_path, prediction_cols)
+                    actuals_future = executor.submit(read_parquet_columns, actuals_path, actual_cols)
+                    predictions_df = predictions_future.result()
+                    actuals_df = actuals_future.result()
 
                 # モデル分析
                 analyzer = ModelAnalyzer(model_dir, data_path)
@@ -315,38 +346,39 @@ def main():
         # 統合レポートのMarkdown生成
         integrated_report_path = output_dir / f'integrated_report_{now.strftime("%Y%m%d_%H%M%S")}.md'
 
+        # 行を溜めてから1回で書き出す
+        parts = []
+        parts.append("# KeibaAI データ品質チェック統合レポート\n\n")
+        parts.append(f"**生成日時**: {now.isoformat()}\n\n")
+
+        if run_validation:
+            parts.append("## 1. データバリデーション\n\n")
+            parts.append(f"- ✓ 合格: {validation_summary['passed']}\n")
+            parts.append(f"- ⚠ 警告: {validation_summary['warnings']}\n")
+            parts.append(f"- ✗ 失敗: {validation_summary['failed']}\n\n")
+            parts.append(f"詳細は `validation_report_{timestamp}.md` を参照してください。\n\n")
+
+        if run_monitoring:
+            parts.append("## 2. リアルタイムモニタリング\n\n")
+            parts.append(f"- 総メトリクス数: {summary['total_metrics']}\n")
+            parts.append(f"- 総アラート数: {summary['total_alerts']}\n\n")
+            parts.append("### アラート内訳\n\n")
+            parts.extend(f"- {severity}: {count}\n" for severity, count in summary['alert_by_severity'].items())
+            parts.append(f"\n詳細は `monitoring_metrics_{timestamp}.json` を参照してください。\n\n")
+
+        if run_model_analysis and 'report' in locals():
+            parts.append("## 3. モデル分析\n\n")
+            parts.append("### 全体的な評価指標\n\n")
+            parts.extend(f"- **{metric}**: {value:.4f}\n" for metric, value in report.overall_metrics.items())
+            parts.append("\n### 改善提案\n\n")
+            parts.extend(f"{i}. {rec}\n" for i, rec in enumerate(report.recommendations, 1))
+            parts.append(f"\n詳細は `model_analysis_{timestamp}.md` を参照してください。\n\n")
+
+        parts.append("---\n\n")
+        parts.append("このレポートは自動生成されました。\n")
+
         with open(integrated_report_path, 'w', encoding='utf-8') as f:
-            f.write("# KeibaAI データ品質チェック統合レポート\n\n")
-            f.write(f"**生成日時**: {now.isoformat()}\n\n")
-
-            if run_validation:
-                f.write("## 1. データバリデーション\n\n")
-                f.write(f"- ✓ 合格: {validation_summary['passed']}\n")
-                f.write(f"- ⚠ 警告: {validation_summary['warnings']}\n")
-                f.write(f"- ✗ 失敗: {validation_summary['failed']}\n\n")
-                f.write(f"詳細は `validation_report_{timestamp}.md` を参照してください。\n\n")
-
-            if run_monitoring:
-                f.write("## 2. リアルタイムモニタリング\n\n")
-                f.write(f"- 総メトリクス数: {summary['total_metrics']}\n")
-                f.write(f"- 総アラート数: {summary['total_alerts']}\n\n")
-                f.write("### アラート内訳\n\n")
-                for severity, count in summary['alert_by_severity'].items():
-                    f.write(f"- {severity}: {count}\n")
-                f.write(f"\n詳細は `monitoring_metrics_{timestamp}.json` を参照してください。\n\n")
-
-            if run_model_analysis and 'report' in locals():
-                f.write("## 3. モデル分析\n\n")
-                f.write("### 全体的な評価指標\n\n")
-                for metric, value in report.overall_metrics.items():
-                    f.write(f"- **{metric}**: {value:.4f}\n")
-                f.write("\n### 改善提案\n\n")
-                for i, rec in enumerate(report.recommendations, 1):
-                    f.write(f"{i}. {rec}\n")
-                f.write(f"\n詳細は `model_analysis_{timestamp}.md` を参照してください。\n\n")
-
-            f.write("---\n\n")
-            f.write("このレポートは自動生成されました。\n")
+            f.write("".join(parts))
 
         logging.info(f"✓ 統合レポート生成完了: {integrated_report_path}")
 
@@ -21,16 +21,31 @@ Seleniumタイムアウトを防ぐため、処理を小さなバッチに分割
 
 import argparse
 import logging
-from datetime import datetime, timedelta
+import random
 from pathlib import Path
 import sys
+import sqlite3
 import subprocess
+import threading
 import time
+from collections import deque
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import closing
+
+import numpy as np
 
 # プロジェクトルートをsys.pathに追加
 project_root = Path(__file__).resolve().parent.parent.parent
 sys.path.append(str(project_root))
 
+from keibaai.scripts.initialize_db import initialize_database, create_indexes, drop_indexes
+
+# 1バッチあたりのタイムアウト (秒)
+BATCH_TIMEOUT_SEC = 7200
+# 失敗時にログへ出す子プロセス出力の行数
+OUTPUT_TAIL_LINES = 200
+
 def setup_logging():
     """ロギング設定"""
     logging.basicConfig(
@@ -57,23 +72,17 @@ def split_date_range(start_date: str, end_date: str, batch_size_days: int):
     Returns:
         List[(start, end)]: バッチごとの開始日・終了日のリスト
     """
-    start = datetime.strptime(start_date, '%Y-%m-%d')
-    end = datetime.strptime(end_date, '%Y-%m-%d')
+    # np.datetime64 はゼロ埋めされていない日付 (2024-1-1) を解釈できないため、先に strptime で解析する
+    start = np.datetime64(datetime.strptime(start_date, '%Y-%m-%d').date(), 'D')
+    end = np.datetime64(datetime.strptime(end_date, '%Y-%m-%d').date(), 'D')
 
-    batches = []
-    current_start = start
+    # 各バッチの開始日・終了日をまとめて計算する (datetime64[D] は YYYY-MM-DD で文字列化される)
+    starts = np.arange(start, end + 1, batch_size_days, dtype='datetime64[D]')
+    ends = np.minimum(starts + (batch_size_days - 1), end)
 
-    while current_start <= end:
-        current_end = min(current_start + timedelta(days=batch_size_days - 1), end)
-        batches.append((
-            current_start.strftime('%Y-%m-%d'),
-            current_end.strftime('%Y-%m-%d')
-        ))
-        current_start = current_end + timedelta(days=1)
+    return list(zip(starts.astype(str).tolist(), ends.astype(str).tolist()))
 
-    return batches
-
-def run_scraping_batch(from_date: str, to_date: str, skip: bool):
+def run_scraping_batch(from_date: str, to_date: str, skip: bool, batch_id: str = None):
     """
     1バッチ分のスクレイピングを実行
 
@@ -81,6 +90,7 @@ def run_scraping_batch(from_date: str, to_date: str, skip: bool):
         from_date: 開始日
         to_date: 終了日
         skip: 既存ファイルをスキップするか
+        batch_id: ログの各行に付けるバッチ識別子 (例: "3/10")。並列実行時にどのバッチの出力か分かるようにする
 
     Returns:
         bool: 成功したらTrue
@@ -99,33 +109,71 @@ def run_scraping_batch(from_date: str, to_date: str, skip: bool):
     else:
         cmd.append('--no-skip')
 
-    logging.info(f"バッチ実行: {from_date} 〜 {to_date}")
-    logging.info(f"コマンド: {' '.join(cmd)}")
+    prefix = f"[バッチ {batch_id}] " if batch_id else ""
+    logging.info(f"{prefix}バッチ実行: {from_date} 〜 {to_date}")
+    logging.info(f"{prefix}コマンド: {' '.join(cmd)}")
 
     try:
-        result = subprocess.run(
+        # 出力を全てメモリに溜めず、1行ずつログへ流す (エラー報告用に末尾だけ保持)
+        process = subprocess.Popen(
             cmd,
-            capture_output=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
             text=True,
             encoding='utf-8',
-            timeout=7200  # 2時間タイムアウト
+            errors='replace',
+            bufsize=1
         )
+        # 2時間タイムアウト (出力を読み続けている間も打ち切れるようにタイマーで kill する)
+        # タイムアウトしたかどうかはタイマーが発火したことをフラグで記録して判定する
+        timed_out_event = threading.Event()
+
+        def on_timeout():
+            timed_out_event.set()
+            process.kill()
+
+        timer = threading.Timer(BATCH_TIMEOUT_SEC, on_timeout)
+        timer.start()
+        tail = deque(maxlen=OUTPUT_TAIL_LINES)
+        try:
+            for line in process.stdout:
+                line = line.rstrip()
+                tail.append(line)
+                logging.info(f"{prefix}[{from_date}〜{to_date}] {line}")
+            returncode = process.wait()
+        finally:
+            timer.cancel()
+            # 読み取り中に例外が出た場合も子プロセスを残さない
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+
+        if timed_out_event.is_set():
+            logging.error(f"{prefix}✗ バッチタイムアウト: {from_date} 〜 {to_date}")
+            return False
 
-        if result.returncode == 0:
-            logging.info(f"✓ バッチ成功: {from_date} 〜 {to_date}")
+        if returncode == 0:
+            logging.info(f"{prefix}✓ バッチ成功: {from_date} 〜 {to_date}")
             return True
         else:
-            logging.error(f"✗ バッチ失敗: {from_date} 〜 {to_date}")
-            logging.error(f"エラー出力:\n{result.stderr}")
+            logging.error(f"{prefix}✗ バッチ失敗: {from_date} 〜 {to_date}")
+            logging.error(f"{prefix}エラー出力（末尾）:\n" + "\n".join(tail))
             return False
 
-    except subprocess.TimeoutExpired:
-        logging.error(f"✗ バッチタイムアウト: {from_date} 〜 {to_date}")
-        return False
     except Exception as e:
-        logging.error(f"✗ バッチ実行エラー: {e}")
+        logging.error(f"{prefix}✗ バッチ実行エラー: {e}")
         return False
 
+def run_scraping_batch_staggered(from_date: str, to_date: str, skip: bool, max_delay: int, batch_id: str = None):
+    """
+    開始タイミングをランダムにずらしてから1バッチ分のスクレイピングを実行
+    (並列実行時にリクエストが同時に集中しないようにする)
+    """
+    if max_delay > 0:
+        time.sleep(random.uniform(0, max_delay))
+    return run_scraping_batch(from_date, to_date, skip, batch_id)
+
 def main():
     """メイン処理"""
     parser = argparse.ArgumentParser(
@@ -138,6 +186,9 @@ def main():
 
   # カスタムバッチサイズ（50日ごと）
   python %(prog)s --from 2024-01-01 --to 2024-12-31 --batch-size 50 --no-skip
+
+  # 3バッチずつ並列実行
+  python %(prog)s --from 2020-01-01 --to 2024-12-31 --batch-size 100 --parallel 3
         """
     )
 
@@ -155,6 +206,10 @@ def main():
                         help='失敗したバッチを再試行')
     parser.add_argument('--wait-between-batches', type=int, default=30,
                         help='バッチ間の待機時間（秒）デフォルト: 30')
+    parser.add_argument('--parallel', type=int, default=1,
+                        help='同時に実行するバッチ数（2〜4程度を推奨）デフォルト: 1')
+    parser.add_argument('--defer-indexes', action='store_true',
+                        help='メタデータDBのインデックスを外して実行し、完了後に再作成（大量バックフィル向け）')
 
     args = parser.parse_args()
 
@@ -178,52 +233,92 @@ def main():
 
     logger.info("\n" + "=" * 80)
 
-    # バッチ実行
-    success_count = 0
-    failed_batches = []
-
-    for i, (start, end) in enumerate(batches, 1):
-        logger.info(f"\n[バッチ {i}/{len(batches)}] 実行開始")
-        logger.info(f"対象期間: {start} 〜 {end}")
+    # 大量投入時はインデックスを外しておき、投入完了後にまとめて作成する
+    if args.defer_indexes:
+        db_path = initialize_database(with_indexes=False)
+        with closing(sqlite3.connect(db_path)) as conn:
+            drop_indexes(conn)
+        logger.info("インデックス作成をバッチ完了後まで延期します")
 
-        success = run_scraping_batch(start, end, args.skip)
-
-        if success:
-            success_count += 1
+    try:
+        # バッチ実行
+        success_count = 0
+        failed_batches = []
+
+        if args.parallel > 1:
+            # 各バッチは子プロセスで動くため、待機はスレッドで並列化する
+            logger.info(f"{args.parallel} 並列でバッチを実行します")
+            with ThreadPoolExecutor(max_workers=args.parallel) as executor:
+                futures = {
+                    executor.submit(run_scraping_batch_staggered, start, end, args.skip,
+                                    args.wait_between_batches, f"{i}/{len(batches)}"): (i, start, end)
+                    for i, (start, end) in enumerate(batches, 1)
+                }
+                for done, future in enumerate(as_completed(futures), 1):
+                    i, start, end = futures[future]
+                    try:
+                        success = future.result()
+                    except Exception as e:
+                        logger.error(f"[バッチ {i}/{len(batches)}] ✗ 実行エラー: {e}")
+                        success = False
+                    if success:
+                        success_count += 1
+                    else:
+                        failed_batches.append((i, start, end))
+                    logger.info(
+                        f"[バッチ {i}/{len(batches)}] 終了 ({'成功' if success else '失敗'}) "
+                        f"- 完了 {done}/{len(batches)}"
+                    )
+            failed_batches.sort()
         else:
-            failed_batches.append((i, start, end))
-
-        # バッチ間で待機（サーバー負荷軽減）
-        if i < len(batches):
-            wait_time = args.wait_between_batches
-            logger.info(f"次のバッチまで {wait_time} 秒待機...")
-            time.sleep(wait_time)
-
-    # 結果サマリー
-    logger.info("\n" + "=" * 80)
-    logger.info("バッチ処理完了")
-    logger.info("=" * 80)
-    logger.info(f"成功: {success_count}/{len(batches)} バッチ")
-    logger.info(f"失敗: {len(failed_batches)}/{len(batches)} バッチ")
-
-    if failed_batches:
-        logger.warning("\n失敗したバッチ:")
-        for batch_num, start, end in failed_batches:
-            logger.warning(f"  バッチ {batch_num}: {start} 〜 {end}")
+            for i, (start, end) in enumerate(batches, 1):
+                logger.info(f"\n[バッチ {i}/{len(batches)}] 実行開始")
+                logger.info(f"対象期間: {start} 〜 {end}")
+
+                success = run_scraping_batch(start, end, args.skip, f"{i}/{len(batches)}")
+
+                if success:
+                    success_count += 1
+                else:
+                    failed_batches.append((i, start, end))
+
+                # バッチ間で待機（サーバー負荷軽減）
+                if i < len(batches):
+                    wait_time = args.wait_between_batches
+                    logger.info(f"次のバッチまで {wait_time} 秒待機...")
+                    time.sleep(wait_time)
+
+        # 結果サマリー
+        logger.info("\n" + "=" * 80)
+        logger.info("バッチ処理完了")
+        logger.info("=" * 80)
+        logger.info(f"成功: {success_count}/{len(batches)} バッチ")
+        logger.info(f"失敗: {len(failed_batches)}/{len(batches)} バッチ")
+
+        if failed_batches:
+            logger.warning("\n失敗したバッチ:")
+            for batch_num, start, end in failed_batches:
+                logger.warning(f"  バッチ {batch_num}: {start} 〜 {end}")
 
-        if args.retry_failed:
-            logger.info("\n失敗したバッチを再試行します...")
-            retry_success = 0
+            if args.retry_failed:
+                logger.info("\n失敗したバッチを再試行します...")
+                retry_success = 0
 
-            for batch_num, start, end in failed_batches:
-                logger.info(f"\n[再試行] バッチ {batch_num}: {start} 〜 {end}")
-                if run_scraping_batch(start, end, args.skip):
-                    retry_success += 1
-                time.sleep(args.wait_between_batches)
+                for batch_num, start, end in failed_batches:
+                    logger.info(f"\n[再試行] バッチ {batch_num}: {start} 〜 {end}")
+                    if run_scraping_batch(start, end, args.skip, f"{batch_num}/{len(batches)}"):
+                        retry_success += 1
+                    time.sleep(args.wait_between_batches)
 
-            logger.info(f"\n再試行結果: {retry_success}/{len(failed_batches)} バッチが成功")
-    else:
-        logger.info("\n✓ すべてのバッチが正常終了しました")
+                logger.info(f"\n再試行結果: {retry_success}/{len(failed_batches)} バッチが成功")
+        else:
+            logger.info("\n✓ すべてのバッチが正常終了しました")
+    finally:
+        if args.defer_indexes:
+            logger.info("インデックスを作成中...")
+            with closing(sqlite3.connect(db_path)) as conn:
+                create_indexes(conn)
+            logger.info("✓ インデックスを作成しました")
 
     logger.info("\n" + "=" * 80)
 
@@ -0,0 +1,12 @@
+import os
+import sys
+from pathlib import Path
+
+# プロジェクトルート（Keiba_AI_v2）をパスに追加
+# 現在のファイル: keibaai/src/dashboard/_paths.py
+# 3つ上がプロジェクトルート
+project_root = Path(os.path.abspath(__file__)).parents[3]
+
+# Streamlitは再実行のたびにページを評価するが、モジュールの import は一度だけなので重複追加されない
+if str(project_root) not in sys.path:
+    sys.path.append(str(project_root))
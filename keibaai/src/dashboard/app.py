@@ -1,12 +1,64 @@
 import streamlit as st
 from pathlib import Path
-import sys
-import yaml
+import os
+
+# プロジェクトルートをパスに追加 (_paths の import 時に一度だけ行う)
+from _paths import project_root
+
+from keibaai.src.pipeline_core import load_config_cached
+
+
+def tail_lines(path: Path, n: int = 20, block: int = 8192) -> list:
+    """
+    ファイル末尾から n 行だけを読み込む
+
+    ファイル全体を readlines() せず、末尾から block バイトずつ遡って読む。
+    """
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b""
+        # 末尾の改行を除いて n 行分の区切りが揃うまで遡る
+        while pos > 0 and data.count(b"\n") <= n:
+            read_size = min(block, pos)
+            pos -= read_size
+            f.seek(pos)
+            data = f.read(read_size) + data
+    lines = data.decode("utf-8", errors="ignore").splitlines(keepends=True)
+    return lines[-n:]
+
+
+@st.cache_data(show_spinner=False)
+def load_config(config_path: str, mtime: float) -> dict:
+    """設定ファイルを読み込む (mtimeが変わるまで再実行間でキャッシュ)"""
+    return load_config_cached(config_path)
+
+
+def iter_log_entries(log_dir: str):
+    """ログディレクトリ以下の *.log を os.scandir で再帰的に列挙する (リストは作らない)"""
+    pending = [log_dir]
+    while pending:
+        try:
+            with os.scandir(pending.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.name.endswith(".log"):
+                        yield entry
+        except OSError:
+            continue
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def find_latest_log(log_dir: str):
+    """
+    最新のログファイルを探す (ログディレクトリの走査を再実行ごとに繰り返さない)
+
+    全ファイルをソートせず、1回の走査で max() により最大mtimeのファイルを選ぶ。
+    """
+    latest = max(iter_log_entries(log_dir), key=lambda e: e.stat().st_mtime, default=None)
+    return Path(latest.path) if latest else None
 
-# プロジェクトルートをパスに追加
-# app.py -> dashboard -> src -> keibaai -> Keiba_AI_v2 (4階層上)
-project_root = Path(__file__).resolve().parent.parent.parent.parent
-sys.path.append(str(project_root))
 
 st.set_page_config(
     page_title="KeibaAI ダッシュボード",
@@ -41,8 +93,7 @@ st.markdown("""
 # 設定ファイルの読み込み確認
 try:
     config_path = project_root / "keibaai" / "configs" / "default.yaml"
-    with open(config_path, "r", encoding="utf-8") as f:
-        config = yaml.safe_load(f)
+    config = load_config(str(config_path), config_path.stat().st_mtime)
     st.success(f"✅ 設定ファイルを読み込みました: {config_path}")
 except Exception as e:
     st.error(f"❌ 設定ファイルの読み込みに失敗しました: {e}")
@@ -52,14 +103,12 @@ st.subheader("📝 最新のシステムログ")
 try:
     log_dir = project_root / "keibaai" / "data" / "logs"
     # 最新のログファイルを探す (YYYY/MM/DD/*.log)
-    log_files = sorted(log_dir.glob("**/*.log"), key=lambda x: x.stat().st_mtime, reverse=True)
+    latest_log = find_latest_log(str(log_dir))
     
-    if log_files:
-        latest_log = log_files[0]
+    if latest_log:
         st.info(f"最新ログ: {latest_log.relative_to(project_root)}")
-        with open(latest_log, "r", encoding="utf-8", errors="ignore") as f:
-            lines = f.readlines()
-            st.code("".join(lines[-20:]), language="text") # 最後の20行を表示
+        lines = tail_lines(latest_log, n=20)
+        st.code("".join(lines), language="text") # 最後の20行を表示
     else:
         st.warning("ログファイルが見つかりません。")
 except Exception as e:
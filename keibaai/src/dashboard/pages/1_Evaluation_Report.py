@@ -4,13 +4,11 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from pathlib import Path
-import sys
 
-# プロジェクトルートをパスに追加
-project_root = Path(__file__).resolve().parent.parent.parent.parent
-sys.path.append(str(project_root))
+# プロジェクトルートをパスに追加 (_paths の import 時に一度だけ行う)
+from _paths import project_root
 
-from src.utils.data_utils import load_parquet_data_by_date
+from keibaai.src.utils.data_utils import load_parquet_data_by_date
 
 st.set_page_config(page_title="AIの成績表", page_icon="📊", layout="wide")
 
@@ -34,28 +32,58 @@ start_date = st.sidebar.date_input("開始日", default_start)
 end_date = st.sidebar.date_input("終了日", default_end)
 
 # --- データロード ---
-# --- データロード ---
-@st.cache_data
-def load_evaluation_data():
-    eval_path = project_root / "keibaai/data/evaluation/evaluation_results.csv"
-    if eval_path.exists():
-        df = pd.read_csv(eval_path)
-        df['date'] = pd.to_datetime(df['date'])
-        return df
-    else:
-        return pd.DataFrame()
+EVAL_CSV_PATH = project_root / "keibaai/data/evaluation/evaluation_results.csv"
+
+
+@st.cache_data(show_spinner=False)
+def load_evaluation_data(csv_path: str, mtime: float):
+    """
+    評価結果を読み込む (CSVのmtimeが変わるまでキャッシュ)
+
+    evaluate_model.py がCSVと一緒に書き出すParquetがCSVより新しければそちらを読む。
+    """
+    csv_path = Path(csv_path)
+    parquet_path = csv_path.with_suffix('.parquet')
+    if parquet_path.exists() and parquet_path.stat().st_mtime >= mtime:
+        return pd.read_parquet(parquet_path)
+
+    df = pd.read_csv(csv_path)
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+
+@st.cache_data(show_spinner=False)
+def filter_by_date(csv_path: str, mtime: float, start, end):
+    """期間で絞り込んだ評価結果 (期間が変わらない再実行ではキャッシュを返す)"""
+    eval_df = load_evaluation_data(csv_path, mtime)
+    return eval_df.loc[eval_df['date'].between(pd.Timestamp(start), pd.Timestamp(end))]
+
+
+METRIC_COLUMNS = ['rmse', 'spearman_corr', 'hit_rate']
+
+
+@st.cache_data(show_spinner=False)
+def summarize_metrics(csv_path: str, mtime: float, start, end):
+    """指標ごとの平均と前日比の平均をまとめて計算する"""
+    metrics = filter_by_date(csv_path, mtime, start, end)[METRIC_COLUMNS]
+    return metrics.mean(), metrics.diff().mean()
+
+
+if not EVAL_CSV_PATH.exists():
+    st.warning("⚠️ 評価データが見つかりません。`evaluate_model.py` を実行してください。")
+    # デモデータを表示する場合のフォールバック（必要なら残すが、今回はリアルデータ優先）
+    st.stop()
 
 # データを読み込む
-eval_df = load_evaluation_data()
+eval_mtime = EVAL_CSV_PATH.stat().st_mtime
+eval_df = load_evaluation_data(str(EVAL_CSV_PATH), eval_mtime)
 
 if eval_df.empty:
     st.warning("⚠️ 評価データが見つかりません。`evaluate_model.py` を実行してください。")
-    # デモデータを表示する場合のフォールバック（必要なら残すが、今回はリアルデータ優先）
     st.stop()
 
 # 日付フィルタリング
-mask = (eval_df['date'] >= pd.to_datetime(start_date)) & (eval_df['date'] <= pd.to_datetime(end_date))
-filtered_df = eval_df[mask].copy()
+filtered_df = filter_by_date(str(EVAL_CSV_PATH), eval_mtime, start_date, end_date)
 
 if filtered_df.empty:
     st.warning("指定された期間のデータがありません。")
@@ -65,13 +93,14 @@ if filtered_df.empty:
 demo_data = filtered_df
 
 # --- メトリクスサマリー ---
+means, deltas = summarize_metrics(str(EVAL_CSV_PATH), eval_mtime, start_date, end_date)
 col1, col2, col3 = st.columns(3)
 with col1:
-    st.metric("平均タイム誤差 (RMSE)", f"{demo_data['rmse'].mean():.4f}", f"{demo_data['rmse'].diff().mean():.4f} (前日比)")
+    st.metric("平均タイム誤差 (RMSE)", f"{means['rmse']:.4f}", f"{deltas['rmse']:.4f} (前日比)")
 with col2:
-    st.metric("順位予想の正確さ (相関係数)", f"{demo_data['spearman_corr'].mean():.4f}", f"{demo_data['spearman_corr'].diff().mean():.4f} (前日比)")
+    st.metric("順位予想の正確さ (相関係数)", f"{means['spearman_corr']:.4f}", f"{deltas['spearman_corr']:.4f} (前日比)")
 with col3:
-    st.metric("的中率 (3着内率)", f"{demo_data['hit_rate'].mean():.2%}", f"{demo_data['hit_rate'].diff().mean():.2%} (前日比)")
+    st.metric("的中率 (3着内率)", f"{means['hit_rate']:.2%}", f"{deltas['hit_rate']:.2%} (前日比)")
 
 # --- チャート表示 ---
 st.subheader("📈 成績の推移")
@@ -80,13 +109,13 @@ tab1, tab2 = st.tabs(["順位予想の正確さ", "タイム誤差"])
 
 with tab1:
     fig_corr = px.line(demo_data, x='date', y='spearman_corr', title='日ごとの順位予想の正確さ')
-    fig_corr.add_hline(y=demo_data['spearman_corr'].mean(), line_dash="dash", annotation_text="平均")
+    fig_corr.add_hline(y=means['spearman_corr'], line_dash="dash", annotation_text="平均")
     st.plotly_chart(fig_corr, use_container_width=True)
     st.caption("💡 **AI解説**: グラフが上にある日は、AIがレース展開を正しく読めています。逆に下にある日は、予想外の馬が来たりして荒れたレースが多かった可能性があります。")
 
 with tab2:
     fig_rmse = px.line(demo_data, x='date', y='rmse', title='日ごとのタイム誤差')
-    fig_rmse.add_hline(y=demo_data['rmse'].mean(), line_dash="dash", annotation_text="平均")
+    fig_rmse.add_hline(y=means['rmse'], line_dash="dash", annotation_text="平均")
     st.plotly_chart(fig_rmse, use_container_width=True)
     st.caption("💡 **AI解説**: グラフが下にあるほど、タイムを正確に予想できています。")
 
@@ -94,23 +123,35 @@ with tab2:
 st.subheader("🔍 詳しく見る")
 col_a, col_b = st.columns(2)
 
-with col_a:
-    st.markdown("#### 🏟️ 競馬場ごとの得意・不得意")
-    # ダミーデータ
+@st.cache_data
+def load_segment_panels(seed: int = 0):
+    """競馬場別・距離別パネルのダミーデータ (乱数はまとめて1回だけ生成する)"""
+    rng = np.random.default_rng(seed)
+    accuracy = rng.uniform(0.3, 0.6, size=(2, 4))
+    race_counts = rng.integers(50, 200, size=(2, 4))
+
     venues = ['東京', '中山', '京都', '阪神']
     venue_data = pd.DataFrame({
         '競馬場': venues,
-        '正確さ (相関係数)': np.random.uniform(0.3, 0.6, size=4),
-        'レース数': np.random.randint(50, 200, size=4)
+        '正確さ (相関係数)': accuracy[0],
+        'レース数': race_counts[0]
     })
-    st.dataframe(venue_data, hide_index=True)
-
-with col_b:
-    st.markdown("#### 📏 距離ごとの得意・不得意")
     distances = ['短距離 (Sprint)', 'マイル (Mile)', '中距離 (Intermediate)', '長距離 (Long)']
     dist_data = pd.DataFrame({
         '距離区分': distances,
-        '正確さ (相関係数)': np.random.uniform(0.3, 0.6, size=4),
-        'レース数': np.random.randint(50, 200, size=4)
+        '正確さ (相関係数)': accuracy[1],
+        'レース数': race_counts[1]
     })
+    return venue_data, dist_data
+
+
+# ダミーデータ
+venue_data, dist_data = load_segment_panels()
+
+with col_a:
+    st.markdown("#### 🏟️ 競馬場ごとの得意・不得意")
+    st.dataframe(venue_data, hide_index=True)
+
+with col_b:
+    st.markdown("#### 📏 距離ごとの得意・不得意")
     st.dataframe(dist_data, hide_index=True)
@@ -2,14 +2,11 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from pathlib import Path
-import sys
 import json
 import numpy as np
 
-# プロジェクトルートをパスに追加
-project_root = Path(__file__).resolve().parent.parent.parent.parent
-sys.path.append(str(project_root))
+# プロジェクトルートをパスに追加 (_paths の import 時に一度だけ行う)
+from _paths import project_root
 
 st.set_page_config(page_title="レース予想とシミュレーション", page_icon="🎲", layout="wide")
 
@@ -46,17 +43,13 @@ def load_simulation_data(race_id):
     # path = project_root / f"keibaai/data/simulations/{race_id}/simulation.json"
     return None
 
-sim_data = load_simulation_data(race_id_display)
-
-if sim_data is None:
-    st.warning("⚠️ このレースのシミュレーションデータが見つかりません。デモデータを表示します。")
-    
-    # デモデータ生成
-    n_horses = 16
+@st.cache_data
+def make_demo_df(race_id, n_horses: int = 16):
+    """デモデータ生成 (レースIDごとにキャッシュし、ウィジェット操作のたびに作り直さない)"""
     horse_numbers = list(range(1, n_horses + 1))
     win_probs = np.random.dirichlet(np.ones(n_horses), size=1)[0]
     odds = 1 / win_probs * np.random.uniform(0.8, 1.2, size=n_horses) # オッズは確率の逆数付近
-    
+
     df = pd.DataFrame({
         '馬番': horse_numbers,
         '予測勝率': win_probs,
@@ -64,6 +57,19 @@ if sim_data is None:
         '馬名': [f"デモホース{i}" for i in horse_numbers]
     })
     df['期待値'] = df['予測勝率'] * df['単勝オッズ']
+    return df
+
+@st.cache_data
+def breakeven_line(odds_min: float, odds_max: float):
+    """損益分岐ライン (y = 1/x) の座標"""
+    x_range = np.linspace(odds_min, odds_max, 100)
+    return x_range, 1 / x_range
+
+sim_data = load_simulation_data(race_id_display)
+
+if sim_data is None:
+    st.warning("⚠️ このレースのシミュレーションデータが見つかりません。デモデータを表示します。")
+    df = make_demo_df(race_id_display)
 else:
     df = pd.DataFrame(sim_data) # 仮
 
@@ -98,8 +104,7 @@ with col2:
     )
     
     # 損益分岐ライン (y = 1/x)
-    x_range = np.linspace(df['単勝オッズ'].min(), df['単勝オッズ'].max(), 100)
-    y_range = 1 / x_range
+    x_range, y_range = breakeven_line(float(df['単勝オッズ'].min()), float(df['単勝オッズ'].max()))
     fig_ev.add_trace(go.Scatter(x=x_range, y=y_range, mode='lines', name='損益分岐点', line=dict(dash='dash', color='red')))
     
     st.plotly_chart(fig_ev, use_container_width=True)
@@ -122,20 +127,27 @@ st.divider()
 st.subheader("🤔 もしも分析 (オッズが変わったら？)")
 st.markdown("「もしオッズが下がったら、まだ買う価値はある？」を確認できます。")
 
-target_horse = st.selectbox("分析対象の馬を選択", df['馬番'])
-current_odds = df[df['馬番'] == target_horse]['単勝オッズ'].values[0]
-new_odds = st.slider(f"馬番 {target_horse} のオッズを変更してみる", min_value=1.0, max_value=100.0, value=float(current_odds))
-
-current_prob = df[df['馬番'] == target_horse]['予測勝率'].values[0]
-new_ev = current_prob * new_odds
-
-col_w1, col_w2 = st.columns(2)
-with col_w1:
-    st.metric("現在の期待値", f"{current_prob * current_odds:.2f}")
-with col_w2:
-    st.metric("変更後の期待値", f"{new_ev:.2f}", delta=f"{new_ev - (current_prob * current_odds):.2f}")
-
-if new_ev > 1.0:
-    st.success(f"馬番 {target_horse} はオッズ {new_odds} でも「買い」です！ (期待値 > 1.0)")
-else:
-    st.error(f"馬番 {target_horse} はオッズ {new_odds} だと旨味がありません。 (期待値 < 1.0)")
+# スライダー操作時はこのパネルだけを再実行し、上のグラフや表は作り直さない
+@st.fragment
+def whatif_panel(df):
+    target_horse = st.selectbox("分析対象の馬を選択", df['馬番'])
+    # 対象馬の行は1回の参照で取り出す
+    target_row = df.set_index('馬番').loc[target_horse]
+    current_odds = target_row['単勝オッズ']
+    current_prob = target_row['予測勝率']
+    new_odds = st.slider(f"馬番 {target_horse} のオッズを変更してみる", min_value=1.0, max_value=100.0, value=float(current_odds))
+
+    new_ev = current_prob * new_odds
+
+    col_w1, col_w2 = st.columns(2)
+    with col_w1:
+        st.metric("現在の期待値", f"{current_prob * current_odds:.2f}")
+    with col_w2:
+        st.metric("変更後の期待値", f"{new_ev:.2f}", delta=f"{new_ev - (current_prob * current_odds):.2f}")
+
+    if new_ev > 1.0:
+        st.success(f"馬番 {target_horse} はオッズ {new_odds} でも「買い」です！ (期待値 > 1.0)")
+    else:
+        st.error(f"馬番 {target_horse} はオッズ {new_odds} だと旨味がありません。 (期待値 < 1.0)")
+
+whatif_panel(df)
@@ -2,13 +2,11 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from pathlib import Path
-import sys
+import zlib
 import numpy as np
 
-# プロジェクトルートをパスに追加
-project_root = Path(__file__).resolve().parent.parent.parent.parent
-sys.path.append(str(project_root))
+# プロジェクトルートをパスに追加 (_paths の import 時に一度だけ行う)
+from _paths import project_root
 
 st.set_page_config(page_title="予想の根拠", page_icon="🧬", layout="wide")
 
@@ -43,16 +41,40 @@ def load_feature_importance():
     }).sort_values('重要度 (%)', ascending=True)
     return df
 
+@st.cache_data
+def load_feature_distribution(feature):
+    """特徴量ごとのダミー分布・PDPデータ (再実行のたびに作り直さないようキャッシュ)"""
+    # 特徴量名から安定したシードを作る (組み込みの hash() はプロセスごとに変わるため crc32 を使う)
+    rng = np.random.default_rng(zlib.crc32(feature.encode('utf-8')))
+    dist_data = rng.normal(loc=50, scale=15, size=1000)
+    x_range = np.linspace(dist_data.min(), dist_data.max(), 50)
+    y_effect = np.sin(x_range / 10) + (x_range / 50) # 適当な非線形関係
+    return dist_data, x_range, y_effect
+
+# Figureの構築は入力が同じなら結果も同じため、再実行のたびに作り直さず使い回す
+@st.cache_resource
+def build_importance_fig():
+    df_imp = load_feature_importance()
+    return px.bar(
+        df_imp, x='重要度 (%)', y='特徴量', orientation='h',
+        title="AIが重視しているデータ TOP10",
+        color='重要度 (%)', color_continuous_scale='Blues'
+    )
+
+@st.cache_resource
+def build_distribution_figs(feature):
+    dist_data, x_range, y_effect = load_feature_distribution(feature)
+    fig_dist = px.histogram(dist_data, nbins=30, title=f"データのばらつき")
+    fig_pdp = px.line(x=x_range, y=y_effect, title=f"値の変化とAI評価の関係")
+    fig_pdp.update_layout(xaxis_title=feature, yaxis_title="AIの評価スコア")
+    return fig_dist, fig_pdp
+
 df_imp = load_feature_importance()
 
 # --- 特徴量重要度 (Bar Chart) ---
 st.subheader("🏆 どのデータが重要？ (重要度ランキング)")
 
-fig_imp = px.bar(
-    df_imp, x='重要度 (%)', y='特徴量', orientation='h',
-    title="AIが重視しているデータ TOP10",
-    color='重要度 (%)', color_continuous_scale='Blues'
-)
+fig_imp = build_importance_fig()
 st.plotly_chart(fig_imp, use_container_width=True)
 
 # --- 特徴量詳細分析 ---
@@ -60,23 +82,16 @@ st.subheader("🔬 詳しく分析する")
 
 selected_feature = st.selectbox("分析するデータを選択", df_imp['特徴量'].sort_values())
 
+fig_dist, fig_pdp = build_distribution_figs(selected_feature)
+
 col1, col2 = st.columns(2)
 
 with col1:
     st.markdown(f"#### 📊 データの分布 ({selected_feature})")
-    # ダミー分布データ
-    dist_data = np.random.normal(loc=50, scale=15, size=1000)
-    fig_dist = px.histogram(dist_data, nbins=30, title=f"データのばらつき")
     st.plotly_chart(fig_dist, use_container_width=True)
 
 with col2:
     st.markdown(f"#### 📈 AIの評価はどう変わる？")
-    # ダミーPDPデータ
-    x_range = np.linspace(dist_data.min(), dist_data.max(), 50)
-    y_effect = np.sin(x_range / 10) + (x_range / 50) # 適当な非線形関係
-    
-    fig_pdp = px.line(x=x_range, y=y_effect, title=f"値の変化とAI評価の関係")
-    fig_pdp.update_layout(xaxis_title=selected_feature, yaxis_title="AIの評価スコア")
     st.plotly_chart(fig_pdp, use_container_width=True)
     
     st.caption("💡 **AI解説**: グラフが右上がりなら「値が大きいほど高評価」、右下がりなら「値が小さいほど高評価」です。")
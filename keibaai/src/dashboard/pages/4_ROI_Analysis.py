@@ -2,13 +2,10 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from pathlib import Path
-import sys
 import numpy as np
 
-# プロジェクトルートをパスに追加
-project_root = Path(__file__).resolve().parent.parent.parent.parent
-sys.path.append(str(project_root))
+# プロジェクトルートをパスに追加 (_paths の import 時に一度だけ行う)
+from _paths import project_root
 
 st.set_page_config(page_title="収支分析", page_icon="💰", layout="wide")
 
@@ -28,29 +25,49 @@ initial_capital = st.sidebar.number_input("最初の資金 (円)", value=1000000
 
 # --- データロード (ダミー) ---
 @st.cache_data
-def load_backtest_results(strategy):
+def load_backtest_results(strategy, initial_capital):
+    """
+    バックテスト結果を読み込む
+
+    資金推移は初期資金に依存するため、initial_capital も引数に取りキャッシュキーに含める
+
+    Returns:
+        (日次の結果のDataFrame, 年 x 月 の月次リターン, (日次リターンの平均, 標準偏差))
+        月次リターンの集計やKPIに使う統計量もキャッシュ内で求め、買い方が変わらない再実行では計算し直さない
+    """
     # TODO: 実際のバックテスト結果を読み込む
     dates = pd.date_range(start="2024-01-01", end="2024-12-31")
     n_days = len(dates)
     
     # ランダムウォークで資産推移を生成
     daily_returns = np.random.normal(loc=0.001, scale=0.02, size=n_days)
-    cumulative_returns = (1 + daily_returns).cumprod()
+    cumulative_returns = np.cumprod(1 + daily_returns)
     capital = initial_capital * cumulative_returns
+
+    # ピークは1回だけ計算してドローダウンに使う
+    peak = np.maximum.accumulate(capital)
+    drawdown = (capital - peak) / peak
     
     df = pd.DataFrame({
         'Date': dates,
         'Capital': capital,
         'Daily Return': daily_returns,
-        'Drawdown': (capital - np.maximum.accumulate(capital)) / np.maximum.accumulate(capital)
+        'Drawdown': drawdown
     })
-    return df
 
-df_res = load_backtest_results(strategy)
+    monthly_pivot = (
+        df.groupby([df['Date'].dt.year.rename('Year'), df['Date'].dt.month.rename('Month')])['Daily Return']
+        .sum()
+        .unstack('Month')
+    )
+    return_stats = (df['Daily Return'].mean(), df['Daily Return'].std())
+    return df, monthly_pivot, return_stats
+
+df_res, _, (return_mean, return_std) = load_backtest_results(strategy, initial_capital)
 
 # --- KPI メトリクス ---
 total_return = (df_res['Capital'].iloc[-1] / initial_capital) - 1
-sharpe_ratio = df_res['Daily Return'].mean() / df_res['Daily Return'].std() * np.sqrt(252)
+sharpe_ratio = return_mean / return_std * np.sqrt(252)
 max_drawdown = df_res['Drawdown'].min()
 
 col1, col2, col3 = st.columns(3)
@@ -61,32 +78,36 @@ with col2:
 with col3:
     st.metric("最大損失率 (ドローダウン)", f"{max_drawdown:.2%}", delta_color="inverse")
 
+# --- グラフ構築 ---
+# Figureは買い方と初期資金が同じなら作り直す必要がないため、まとめてキャッシュして使い回す
+@st.cache_resource
+def build_roi_figs(strategy, initial_capital):
+    df_res, monthly_pivot, _ = load_backtest_results(strategy, initial_capital)
+
+    fig_equity = px.line(df_res, x='Date', y='Capital', title=f"資金の推移 ({strategy})")
+    fig_equity.add_hline(y=initial_capital, line_dash="dash", line_color="gray", annotation_text="最初の資金")
+
+    fig_dd = px.area(df_res, x='Date', y='Drawdown', title="ピークからの一時的な減少率", color_discrete_sequence=['red'])
+
+    fig_heat = px.imshow(
+        monthly_pivot,
+        labels=dict(x="月", y="年", color="リターン"),
+        x=['1月', '2月', '3月', '4月', '5月', '6月', '7月', '8月', '9月', '10月', '11月', '12月'],
+        color_continuous_scale='RdYlGn',
+        text_auto='.1%'
+    )
+    return fig_equity, fig_dd, fig_heat
+
+fig_equity, fig_dd, fig_heat = build_roi_figs(strategy, initial_capital)
+
 # --- 資産推移チャート ---
 st.subheader("📈 資金の増え方 (資産推移)")
-
-fig_equity = px.line(df_res, x='Date', y='Capital', title=f"資金の推移 ({strategy})")
-fig_equity.add_hline(y=initial_capital, line_dash="dash", line_color="gray", annotation_text="最初の資金")
 st.plotly_chart(fig_equity, use_container_width=True)
 
 # --- ドローダウンチャート ---
 st.subheader("📉 資金の減り方 (ドローダウン)")
-fig_dd = px.area(df_res, x='Date', y='Drawdown', title="ピークからの一時的な減少率", color_discrete_sequence=['red'])
 st.plotly_chart(fig_dd, use_container_width=True)
 
 # --- 月次リターン (ヒートマップ) ---
 st.subheader("📅 月ごとの成績")
-
-df_res['Year'] = df_res['Date'].dt.year
-df_res['Month'] = df_res['Date'].dt.month
-
-monthly_returns = df_res.groupby(['Year', 'Month'])['Daily Return'].sum().reset_index()
-monthly_pivot = monthly_returns.pivot(index='Year', columns='Month', values='Daily Return')
-
-fig_heat = px.imshow(
-    monthly_pivot,
-    labels=dict(x="月", y="年", color="リターン"),
-    x=['1月', '2月', '3月', '4月', '5月', '6月', '7月', '8月', '9月', '10月', '11月', '12月'],
-    color_continuous_scale='RdYlGn',
-    text_auto='.1%'
-)
 st.plotly_chart(fig_heat, use_container_width=True)
@@ -3,6 +3,27 @@ import numpy as np
 from typing import Dict, List, Optional
 import logging
 
+
+# 出走数列の型 (データ内容によらず常に同じ型にし、月ごとのParquetでスキーマが揃うようにする)
+# 整数値はfloat32で正確に表せ、左結合で付く欠損もそのまま保持できる
+_COUNT_DTYPE = 'float32'
+
+
+def _downcast(stats: pd.DataFrame) -> pd.DataFrame:
+    """
+    集計結果の出走数列 (*_races / *_count) を固定の小さい型に変換する (結合時に扱うバイト数とメモリを減らす)
+
+    平均・標準偏差の列は既存の特徴量・学習済みモデルと値を揃えるため float64 のままにする。
+    """
+    count_cols = [col for col in stats.columns if col.endswith(('_races', '_count'))]
+    return stats.astype({col: _COUNT_DTYPE for col in count_cols})
+
+
+# 季節のカテゴリと、月 (0-12, 0は欠損) ごとの季節コード
+_SEASONS = ['winter', 'spring', 'summer', 'autumn']
+_SEASON_CODES_BY_MONTH = np.array([-1, 0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3, 0])
+
+
 class AdvancedFeatureEngine:
     """モデル精度向上のための高度な特徴量生成"""
     
@@ -18,40 +39,51 @@ class AdvancedFeatureEngine:
         
         # 1. 直近N走の成績トレンド
         windows = [3, 5, 10]
-        
-        for horse_id in df['horse_id'].unique():
-            horse_perf = performance_df[
-                performance_df['horse_id'] == horse_id
-            ].sort_values('race_date')
-            
-            if len(horse_perf) == 0:
-                continue
-            
-            # 各ウィンドウでの集計
-            for w in windows:
-                recent_races = horse_perf.tail(w)
-                
-                # 平均着順のトレンド
-                df.loc[df['horse_id'] == horse_id, f'avg_finish_last{w}'] = \
-                    recent_races['finish_position'].mean()
-                
-                # 着順の改善率
-                if len(recent_races) >= 2:
-                    first_half = recent_races.head(w//2)['finish_position'].mean()
-                    second_half = recent_races.tail(w//2)['finish_position'].mean()
-                    improvement = (first_half - second_half) / first_half
-                    df.loc[df['horse_id'] == horse_id, f'improvement_rate_{w}'] = improvement
-                
-                # 勝率
-                win_rate = (recent_races['finish_position'] == 1).mean()
-                df.loc[df['horse_id'] == horse_id, f'win_rate_last{w}'] = win_rate
-                
-                # 連対率（2着以内）
-                place_rate = (recent_races['finish_position'] <= 2).mean()
-                df.loc[df['horse_id'] == horse_id, f'place_rate_last{w}'] = place_rate
-        
-        return df
-    
+
+        # 対象馬の成績を1回だけ並べ替え、各馬の最新走からの位置で直近N走を切り出す
+        # (馬ごとに performance_df を絞り込んで代入するループを避ける)
+        perf = performance_df.loc[
+            performance_df['horse_id'].isin(df['horse_id'].unique()),
+            ['horse_id', 'race_date', 'finish_position']
+        ].sort_values(['horse_id', 'race_date'], kind='stable').reset_index(drop=True)
+        if perf.empty:
+            return df
+
+        g = perf.groupby('horse_id', sort=False)
+        pos_from_end = g.cumcount(ascending=False)
+        perf['is_win'] = (perf['finish_position'] == 1).astype(float)
+        perf['is_place'] = (perf['finish_position'] <= 2).astype(float)
+
+        features = {}
+        for w in windows:
+            recent_df = perf.loc[pos_from_end < w]
+            recent_g = recent_df.groupby('horse_id', sort=False)
+
+            # 平均着順のトレンド
+            features[f'avg_finish_last{w}'] = recent_g['finish_position'].mean()
+
+            # 着順の改善率 (直近N走の前半と後半の平均着順を比較、2走以上ある馬のみ)
+            half = w // 2
+            pos_from_start = recent_g.cumcount()
+            first_half = recent_df.loc[pos_from_start < half] \
+                .groupby('horse_id', sort=False)['finish_position'].mean()
+            second_half = perf.loc[pos_from_end < half] \
+                .groupby('horse_id', sort=False)['finish_position'].mean()
+            improvement = (first_half - second_half) / first_half
+            features[f'improvement_rate_{w}'] = improvement.where(recent_g.size() >= 2)
+
+            # 勝率
+            features[f'win_rate_last{w}'] = recent_g['is_win'].mean()
+
+            # 連対率（2着以内）
+            features[f'place_rate_last{w}'] = recent_g['is_place'].mean()
+
+        features = pd.DataFrame(features)
+
+        # 馬ごとの集計結果を1回の結合で付与する (既存の同名列は上書き)
+        df = df.drop(columns=features.columns, errors='ignore')
+        return df.join(features, on='horse_id')
+
     def generate_course_affinity_features(
         self,
         df: pd.DataFrame,
@@ -75,6 +107,7 @@ class AdvancedFeatureEngine:
         else:
             venue_stats.columns = ['horse_id', 'venue', 'venue_avg_finish',
                                   'venue_races']
+        venue_stats = _downcast(venue_stats)
         
         # 距離別成績
         performance_df['distance_category'] = pd.cut(
@@ -90,6 +123,7 @@ class AdvancedFeatureEngine:
         
         distance_stats.columns = ['horse_id', 'distance_category', 
                                  'dist_avg_finish', 'dist_races', 'dist_avg_time']
+        distance_stats = _downcast(distance_stats)
         
         # 馬場別成績
         surface_stats = performance_df.groupby(['horse_id', 'track_surface']).agg({
@@ -99,6 +133,7 @@ class AdvancedFeatureEngine:
         
         surface_stats.columns = ['horse_id', 'track_surface', 
                                 'surface_avg_finish', 'surface_races', 'surface_avg_last3f']
+        surface_stats = _downcast(surface_stats)
         
         # メインデータフレームにマージ
         df = df.merge(venue_stats, on=['horse_id', 'venue'], how='left')
@@ -135,6 +170,7 @@ class AdvancedFeatureEngine:
         # 期待値を上回る度合い
         combo_stats['combo_overperform'] = \
             combo_stats['combo_avg_popularity'] - combo_stats['combo_avg_finish']
+        combo_stats = _downcast(combo_stats)
         
         df = df.merge(combo_stats, on=['jockey_id', 'trainer_id'], how='left')
         
@@ -150,27 +186,38 @@ class AdvancedFeatureEngine:
         
         # 父系の成績集計
         # Note: morning_oddsを使用（win_oddsはデータリークを引き起こす）
-        perf_with_sire = performance_df.merge(
-            pedigree_df[pedigree_df['generation'] == 1][['horse_id', 'ancestor_id']],
-            on='horse_id'
-        )
-
-        agg_dict = {
-            'finish_position': ['mean', 'std'],
-            'distance_m': 'mean'
-        }
-        if 'morning_odds' in perf_with_sire.columns:
-            agg_dict['morning_odds'] = 'mean'
-
-        sire_stats = perf_with_sire.groupby('ancestor_id').agg(agg_dict).reset_index()
+        # 成績を先に馬ごとの合計・件数に畳み込み、(馬, 1代目祖先) の対応表に結合してから祖先ごとに合算する
+        # (成績の全行を祖先の数だけ複製する結合を避ける。1代目には父・母の両方が含まれる)
+        value_cols = ['finish_position', 'distance_m']
+        if 'morning_odds' in performance_df.columns:
+            value_cols.append('morning_odds')
+
+        perf = performance_df[['horse_id'] + value_cols]
+        horse_g = perf.groupby('horse_id', sort=False)
+        horse_sums = horse_g[value_cols].sum().add_suffix('_sum')
+        horse_counts = horse_g[value_cols].count().add_suffix('_n')
+        horse_sq = (perf['finish_position'] ** 2).groupby(perf['horse_id'], sort=False).sum().rename('finish_position_sq')
+        horse_stats = pd.concat([horse_sums, horse_counts, horse_sq], axis=1)
+
+        parents = pedigree_df.loc[pedigree_df['generation'] == 1, ['horse_id', 'ancestor_id']]
+        sire_totals = parents.join(horse_stats, on='horse_id', how='inner') \
+            .drop(columns='horse_id').groupby('ancestor_id').sum()
+
+        n = sire_totals['finish_position_n']
+        finish_sum = sire_totals['finish_position_sum']
+        finish_var = (sire_totals['finish_position_sq'] - finish_sum ** 2 / n) / (n - 1)
+
+        sire_stats = pd.DataFrame({
+            'sire_id': sire_totals.index,
+            'sire_avg_finish': (finish_sum / n).to_numpy(),
+            'sire_std_finish': np.sqrt(finish_var.clip(lower=0).where(n > 1)).to_numpy(),
+            'sire_avg_distance': (sire_totals['distance_m_sum'] / sire_totals['distance_m_n']).to_numpy(),
+        })
+        if 'morning_odds' in value_cols:
+            sire_stats['sire_avg_odds'] = \
+                (sire_totals['morning_odds_sum'] / sire_totals['morning_odds_n']).to_numpy()
+        sire_stats = _downcast(sire_stats)
 
-        if 'morning_odds' in perf_with_sire.columns:
-            sire_stats.columns = ['sire_id', 'sire_avg_finish', 'sire_std_finish',
-                                 'sire_avg_distance', 'sire_avg_odds']
-        else:
-            sire_stats.columns = ['sire_id', 'sire_avg_finish', 'sire_std_finish',
-                                 'sire_avg_distance']
-        
         df = df.merge(sire_stats, left_on='sire_id', right_on='sire_id', how='left')
         
         return df
@@ -376,12 +423,9 @@ class AdvancedFeatureEngine:
         
         # 2. 季節性
         df['race_month'] = pd.to_datetime(df['race_date']).dt.month
-        df['race_season'] = df['race_month'].map({
-            12: 'winter', 1: 'winter', 2: 'winter',
-            3: 'spring', 4: 'spring', 5: 'spring',
-            6: 'summer', 7: 'summer', 8: 'summer',
-            9: 'autumn', 10: 'autumn', 11: 'autumn'
-        })
+        # 月 -> 季節コードの配列を引くだけで求める (日付欠損は月0 -> コード-1 -> NaN)
+        season_codes = _SEASON_CODES_BY_MONTH[df['race_month'].fillna(0).to_numpy(dtype=int)]
+        df['race_season'] = pd.Categorical.from_codes(season_codes, categories=_SEASONS)
         
         # 3. レースの重要度（賞金ベース）
         # prize_1st または prize_money カラムを使用
@@ -392,12 +436,18 @@ class AdvancedFeatureEngine:
             prize_col = 'prize_money'
 
         if prize_col:
-            df['race_importance'] = df[prize_col].fillna(500).apply(
-                lambda x: 'high' if x >= 2000 else ('medium' if x >= 1000 else 'low')
+            # 1000未満: low, 1000以上2000未満: medium, 2000以上: high
+            df['race_importance'] = pd.cut(
+                df[prize_col].fillna(500),
+                bins=[-np.inf, 1000, 2000, np.inf],
+                labels=['low', 'medium', 'high'],
+                right=False
             )
         else:
-            # デフォルト値を設定
-            df['race_importance'] = 'medium'
+            # デフォルト値を設定 (pd.cut の結果と同じカテゴリを持つCategoricalにそろえる)
+            df['race_importance'] = pd.Categorical(
+                ['medium'] * len(df), categories=['low', 'medium', 'high'], ordered=True
+            )
             self.logger.warning("賞金カラム（prize_1st/prize_money）が見つかりません。race_importanceをデフォルト値に設定します。")
         
         return df
@@ -407,41 +457,36 @@ class AdvancedFeatureEngine:
         df: pd.DataFrame
     ) -> pd.DataFrame:
         """レース内での相対的な指標"""
-        
-        # グループごとの処理
-        for race_id in df['race_id'].unique():
-            race_df = df[df['race_id'] == race_id]
-            race_indices = race_df.index
-            
-            # 1. タイムの偏差値
-            if 'finish_time_seconds' in df.columns:
-                mean_time = race_df['finish_time_seconds'].mean()
-                std_time = race_df['finish_time_seconds'].std()
-                if std_time > 0:
-                    df.loc[race_indices, 'time_deviation'] = \
-                        50 + 10 * (race_df['finish_time_seconds'] - mean_time) / std_time
-            
-            # 2. 上がり3Fの相対値
-            if 'last_3f_time' in df.columns:
-                min_last3f = race_df['last_3f_time'].min()
-                df.loc[race_indices, 'last3f_diff_from_best'] = \
-                    race_df['last_3f_time'] - min_last3f
-            
-            # 3. オッズの順位
-            # Note: morning_oddsを使用（win_oddsはデータリークを引き起こす）
-            if 'morning_odds' in df.columns:
-                df.loc[race_indices, 'odds_rank'] = \
-                    race_df['morning_odds'].rank(method='min')
-            elif 'win_odds' in df.columns:
-                # フォールバック（警告を出すべき）
-                self.logger.warning("win_oddsを使用しています。morning_oddsの使用を推奨します（データリーク防止）")
-                df.loc[race_indices, 'odds_rank'] = \
-                    race_df['win_odds'].rank(method='min')
-            
-            # 4. 斤量の相対値
-            if 'basis_weight' in df.columns:
-                avg_weight = race_df['basis_weight'].mean()
-                df.loc[race_indices, 'weight_diff_from_avg'] = \
-                    race_df['basis_weight'] - avg_weight
-        
-        return df
\ No newline at end of file
+
+        # レースごとのループではなく groupby().transform() で一括計算し、
+        # 最後に assign でまとめて追加する (列の逐次追加によるフラグメント化を避ける)
+        g = df.groupby('race_id', sort=False)
+        new_cols = {}
+
+        # 1. タイムの偏差値
+        if 'finish_time_seconds' in df.columns:
+            mean_time = g['finish_time_seconds'].transform('mean')
+            std_time = g['finish_time_seconds'].transform('std')
+            new_cols['time_deviation'] = \
+                50 + 10 * (df['finish_time_seconds'] - mean_time) / std_time.where(std_time > 0)
+
+        # 2. 上がり3Fの相対値
+        if 'last_3f_time' in df.columns:
+            new_cols['last3f_diff_from_best'] = \
+                df['last_3f_time'] - g['last_3f_time'].transform('min')
+
+        # 3. オッズの順位
+        # Note: morning_oddsを使用（win_oddsはデータリークを引き起こす）
+        if 'morning_odds' in df.columns:
+            new_cols['odds_rank'] = g['morning_odds'].rank(method='min')
+        elif 'win_odds' in df.columns:
+            # フォールバック（警告を出すべき）
+            self.logger.warning("win_oddsを使用しています。morning_oddsの使用を推奨します（データリーク防止）")
+            new_cols['odds_rank'] = g['win_odds'].rank(method='min')
+
+        # 4. 斤量の相対値
+        if 'basis_weight' in df.columns:
+            new_cols['weight_diff_from_avg'] = \
+                df['basis_weight'] - g['basis_weight'].transform('mean')
+
+        return df.assign(**new_cols)
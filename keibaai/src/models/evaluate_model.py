@@ -333,6 +333,11 @@ def main():
     eval_df.to_csv(output_path, index=False)
     logging.info(f"評価結果を保存しました: {output_path}")
 
+    # ダッシュボードはCSVより新しいParquetがあればそちらを読む (CSVの再パースを避ける)
+    parquet_path = output_path.with_suffix('.parquet')
+    eval_df.assign(date=pd.to_datetime(eval_df['date'])).to_parquet(parquet_path, index=False)
+    logging.info(f"評価結果を保存しました: {parquet_path}")
+
     # 全体平均のログ出力
     logging.info(f"全体平均 RMSE: {eval_df['rmse'].mean():.4f}")
     logging.info(f"全体平均 Spearman Correlation: {eval_df['spearman_corr'].mean():.4f}")
@@ -33,6 +33,16 @@ class ModelAnalysisReport:
 class ModelAnalyzer:
     """モデル分析・デバッグツール"""
 
+    # analyze() が参照するカラム (Parquet読み込み時の列の絞り込みに使う)
+    MERGE_KEYS = ['race_id', 'horse_id']
+    REQUIRED_PREDICTION_COLS = MERGE_KEYS + ['predicted_score']
+    REQUIRED_ACTUAL_COLS = MERGE_KEYS + ['finish_position']
+    # 存在すれば追加の指標・セグメント分析に使うカラム (どちらのファイルにあってもよい)
+    OPTIONAL_COLS = [
+        'predicted_win_prob', 'predicted_time', 'is_winner', 'finish_time_seconds',
+        'win_odds', 'distance_m', 'track_surface', 'race_class', 'venue', 'weather',
+    ]
+
     def __init__(self, model_path: Path, data_path: Path):
         """
         Args:
@@ -107,7 +117,7 @@ class ModelAnalyzer:
 
     def _merge_predictions_and_actuals(self) -> pd.DataFrame:
         """予測と実績をマージ"""
-        merge_keys = ['race_id', 'horse_id']
+        merge_keys = self.MERGE_KEYS
 
         # キーの正規化
         for df in [self.predictions_df, self.actuals_df]:
@@ -6,6 +6,7 @@
 - parse_with_error_handling: エラーハンドリング付きパーサ実行
 - setup_logging: ロギング設定
 - load_config: YAML設定ファイルの読み込み
+- load_config_cached: JSONキャッシュ付きのYAML設定ファイル読み込み
 - get_db_connection: SQLiteデータベース接続の取得
 """
 
@@ -22,6 +23,12 @@ from typing import Dict, Any
 
 import yaml  # YAMLを扱うために追加
 
+# libyaml (C実装) があれば高速なローダーを使う
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
 
 def load_config(config_path: str) -> Dict[str, Any]:
     """
@@ -30,7 +37,7 @@ def load_config(config_path: str) -> Dict[str, Any]:
     logging.info(f"設定ファイルをロード中: {config_path}")
     try:
         with open(config_path, 'r', encoding='utf-8') as f:
-            config = yaml.safe_load(f)
+            config = yaml.load(f, Loader=YamlLoader)
         return config
     except FileNotFoundError:
         logging.error(f"設定ファイルが見つかりません: {config_path}")
@@ -43,6 +50,36 @@ def load_config(config_path: str) -> Dict[str, Any]:
         raise
 
 
+def load_config_cached(config_path) -> Dict[str, Any]:
+    """
+    YAML設定ファイルをロードする (パース結果をJSONにキャッシュする)
+
+    <name>.yaml.json がYAML以上に新しければそれを読み込み、YAMLのパースを省略する。
+    キャッシュが古い・存在しない場合はYAMLを読み、JSONを書き直す。
+    """
+    config_path = Path(config_path)
+    cache_path = config_path.with_name(config_path.name + '.json')
+
+    try:
+        if cache_path.stat().st_mtime_ns >= config_path.stat().st_mtime_ns:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    except (OSError, ValueError):
+        pass  # キャッシュが無い・壊れている場合はYAMLから読み直す
+
+    config = load_config(str(config_path))
+
+    try:
+        payload = json.dumps(config, ensure_ascii=False)
+        # 日付や非文字列キーなど、JSONで元の値に戻らない設定はキャッシュしない
+        if json.loads(payload) == config:
+            atomic_write(str(cache_path), payload.encode('utf-8'))
+    except (TypeError, ValueError, OSError) as e:
+        logging.debug(f"設定ファイルのキャッシュ作成をスキップ: {e}")
+
+    return config
+
+
 def setup_logging(log_level: str, log_file: str, log_format: str):
     """
     引数に基づいてロギングをシンプルに設定する
@@ -83,9 +120,23 @@ def setup_logging(log_level: str, log_file: str, log_format: str):
         logging.info("簡易フォールバックロギングを使用します")
 
 
+# 接続ごとに設定するPRAGMA (journal_mode=WAL と page_size はDBファイルに保存されるため initialize_db で設定)
+SQLITE_CONNECTION_PRAGMAS = (
+    "journal_mode=WAL",       # 未初期化のDBに接続した場合に備えて設定 (既にWALなら何もしない)
+    "synchronous=NORMAL",     # WAL下ではコミット毎のfsyncを省略
+    "temp_store=MEMORY",
+    "cache_size=-65536",      # 64MB
+    "mmap_size=268435456",    # 256MB
+    "foreign_keys=ON",
+    "busy_timeout=30000",     # ロック中は最大30秒待つ (並列バッチ実行で複数プロセスが同じDBに書き込むため)
+)
+
+
 def get_db_connection(db_path: str) -> sqlite3.Connection:
     """
     SQLiteデータベース接続を取得する
+
+    PRAGMAの多くは接続単位の設定のため、DBへ書き込む処理は必ずこの関数で接続する。
     """
     logging.info(f"データベースに接続中: {db_path}")
     try:
@@ -93,8 +144,8 @@ def get_db_connection(db_path: str) -> sqlite3.Connection:
         db_dir.mkdir(parents=True, exist_ok=True)
         
         conn = sqlite3.connect(db_path)
-        conn.execute('PRAGMA journal_mode=WAL;')  # Write-Ahead Loggingを有効化
-        conn.execute('PRAGMA busy_timeout = 5000;') # タイムアウト設定
+        for pragma in SQLITE_CONNECTION_PRAGMAS:
+            conn.execute(f"PRAGMA {pragma}")
         logging.info("データベース接続成功")
         return conn
     except sqlite3.Error as e:
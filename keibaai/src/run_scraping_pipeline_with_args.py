@@ -22,7 +22,6 @@
 """
 
 import logging
-import sqlite3
 import argparse
 from pathlib import Path
 import yaml
@@ -113,8 +112,8 @@ def main():
     log.info("=" * 70)
 
     db_path = Path(cfg["default"]["database"]["path"])
-    db_path.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(db_path)
+    # 接続単位のPRAGMA (synchronous, busy_timeout 等) を設定した接続を使う
+    conn = pipeline_core.get_db_connection(str(db_path))
 
     try:
         # --- フェーズ0a: スクレイピング対象のIDを特定 ---
@@ -178,18 +177,20 @@ def main():
         log.info("\n" + "=" * 80)
         log.info("【フェーズ3】メタデータの保存")
         log.info("=" * 80)
-        saved_count = 0
+        # ファイルの読み込み・ハッシュ計算を先に済ませ、DBへは1トランザクションでまとめて書き込む
+        # (並列バッチ実行時に書き込みロックを保持する時間を短くする)
+        metadata_rows = []
         for race_id in race_ids:
             url = f"https://db.netkeiba.com/race/{race_id}"
             file_path = str(raw_race_dir / f"{race_id}.bin")
             if Path(file_path).exists():
                 with open(file_path, 'rb') as f:
                     data = f.read()
-                data_utils.save_fetch_metadata(
-                    db_conn=conn, url=url, file_path=file_path, data=data,
+                metadata_rows.append(data_utils.build_fetch_metadata_row(
+                    url=url, file_path=file_path, data=data,
                     http_status=200, fetch_method='requests'
-                )
-                saved_count += 1
+                ))
+        saved_count = data_utils.save_fetch_metadata_many(conn, metadata_rows)
         log.info(f"  ✓ {saved_count:,}件のメタデータを保存しました")
 
     except Exception as e:
@@ -1,13 +1,7 @@
 import streamlit as st
-import sys
-from pathlib import Path
-
-# プロジェクトルートをパスに追加
-# 現在のファイル: keibaai/src/ui/Home.py
-# 3つ上がプロジェクトルート
-project_root = Path(__file__).resolve().parents[3]
-sys.path.append(str(project_root))
 
+# プロジェクトルートをパスに追加 (components._paths の import 時に一度だけ行う)
+from components import _paths  # noqa: F401
 from components.data_loader import DataLoader
 
 st.set_page_config(
@@ -0,0 +1,13 @@
+import os
+import sys
+from pathlib import Path
+
+# プロジェクトルート（Keiba_AI_v2）をパスに追加
+# 現在のファイル: keibaai/src/ui/components/_paths.py
+# 4つ上がプロジェクトルート
+# resolve() はパスの各要素を stat するため使わず、文字列操作だけで求める (一度だけ計算する)
+project_root = Path(os.path.abspath(__file__)).parents[4]
+
+# パッケージとしてインストールされていないため、keibaai.* を import できるようにする
+if str(project_root) not in sys.path:
+    sys.path.append(str(project_root))
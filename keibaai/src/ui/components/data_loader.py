@@ -1,20 +1,101 @@
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
 import lightgbm as lgb
 import json
+from datetime import date
 from pathlib import Path
 import streamlit as st
-import sys
 import os
-from pathlib import Path
 
-# プロジェクトルート（Keiba_AI_v2）をパスに追加
-# 現在のファイル: keibaai/src/ui/components/data_loader.py
-# 4つ上がプロジェクトルート
-project_root = Path(__file__).resolve().parents[4]
-sys.path.append(str(project_root))
+try:
+    import orjson
+except ImportError:  # orjson は任意依存。無ければ標準の json を使う
+    orjson = None
 
+# プロジェクトルート（Keiba_AI_v2）をパスに追加 (components._paths の import 時に一度だけ行う)
+from components import _paths  # noqa: F401
 from keibaai.src.utils.data_utils import load_parquet_data_by_date
 
+def read_json(path):
+    """JSONファイルを読み込む (orjson があれば高速パーサを使う)"""
+    if orjson is not None:
+        return orjson.loads(Path(path).read_bytes())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# 低カーディナリティの文字列カラム / 小さな整数カラム (キャッシュ前に型を縮小する)
+_CATEGORY_COLUMNS = ('venue', 'track_surface', 'weather', 'track_condition', 'sex')
+_SMALL_INT_COLUMNS = ('distance_m', 'head_count', 'bracket_number', 'horse_number')
+
+
+def _downcast(df):
+    """カテゴリ化と整数のダウンキャストでメモリ使用量を削減する"""
+    for col in _CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    for col in _SMALL_INT_COLUMNS:
+        if col in df.columns and pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast='unsigned')
+    return df
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _read_parquet(path, mtime, columns=None):
+    """Parquetファイルをロード (mtimeはキャッシュ無効化のためのキー)"""
+    if columns is not None:
+        # 存在しない列を指定するとエラーになるため、スキーマにある列だけを読む
+        schema = ds.dataset(path, format="parquet").schema
+        columns = [c for c in columns if c in schema.names]
+    return pd.read_parquet(path, columns=columns)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _read_races(path, mtime, year=None, columns=None):
+    """レース情報のParquetをロード (mtimeはキャッシュ無効化のためのキー)"""
+    dataset = ds.dataset(path, format="parquet")
+    schema = dataset.schema
+
+    if columns is not None:
+        columns = [c for c in columns if c in schema.names]
+
+    # Timestamp/Date型であれば年の絞り込みをPyArrowにプッシュダウンする
+    filter_expr = None
+    pushed_down = False
+    if year and 'race_date' in schema.names:
+        field_type = schema.field('race_date').type
+        if pa.types.is_timestamp(field_type) or pa.types.is_date(field_type):
+            field = ds.field('race_date')
+            start = pa.scalar(date(year, 1, 1)).cast(field_type)
+            end = pa.scalar(date(year + 1, 1, 1)).cast(field_type)
+            filter_expr = (field >= start) & (field < end)
+            pushed_down = True
+
+    df = dataset.to_table(columns=columns, filter=filter_expr).to_pandas()
+    df['race_date'] = pd.to_datetime(df['race_date'])
+
+    # 文字列型などでプッシュダウンできなかった場合はPandasでフィルタリング
+    if year and not pushed_down:
+        df = df[df['race_date'].dt.year == year]
+
+    return _downcast(df)
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _list_models(models_dir):
+    """モデルディレクトリ名の一覧 (再実行のたびにディレクトリを走査しないようキャッシュ)"""
+    if not os.path.isdir(models_dir):
+        return []
+
+    # os.scandir の DirEntry は種別情報を持つため、エントリごとの stat を省ける
+    with os.scandir(models_dir) as it:
+        models = [(entry.stat().st_mtime, entry.name) for entry in it if entry.is_dir()]
+    # 更新日時の新しい順 (先頭が最新モデル)
+    models.sort(reverse=True)
+    return [name for _, name in models]
+
+
 class DataLoader:
     def __init__(self, base_dir='.'):
         self.base_dir = Path(base_dir)
@@ -25,12 +106,7 @@ class DataLoader:
         
     def get_available_models(self):
         """利用可能なモデルディレクトリのリストを取得"""
-        if not self.models_dir.exists():
-            return []
-        
-        models = [d.name for d in self.models_dir.iterdir() if d.is_dir()]
-        # 日付順などでソートすると良い
-        return sorted(models, reverse=True)
+        return _list_models(str(self.models_dir))
 
     @st.cache_resource
     def load_model(_self, model_dir_name):
@@ -69,22 +145,24 @@ class DataLoader:
         })
         return df.sort_values('gain', ascending=False)
 
-    @st.cache_data
-    def load_races(_self, year=None):
-        """レース情報をロード"""
-        if not _self.races_path.exists():
+    def load_races(self, year=None, columns=None):
+        """
+        レース情報をロード
+
+        year と columns はParquetリーダーに渡し、必要な行グループ・列だけを読み込む。
+        ファイルの更新時刻をキャッシュキーに含めるため、再生成されれば自動で読み直す。
+        """
+        if not self.races_path.exists():
             return pd.DataFrame()
-            
-        df = pd.read_parquet(_self.races_path)
-        df['race_date'] = pd.to_datetime(df['race_date'])
-        
-        if year:
-            df = df[df['race_date'].dt.year == year]
-            
-        return df
 
-    def load_predictions(self, date_str, model_dir_name):
-        """指定日の予測データをロード"""
+        return _read_races(str(self.races_path), self.races_path.stat().st_mtime, year, columns)
+
+    def load_predictions(self, date_str, model_dir_name, columns=None):
+        """
+        指定日の予測データをロード
+
+        columns を指定した場合は、Parquetリーダーでその列だけを読み込む。
+        """
         # predictions_YYYYMMDD.parquet を探す
         # ただし、現状のパイプラインでは予測ファイル名にモデル名は含まれていないことが多い
         # そのため、日付で探す
@@ -102,8 +180,8 @@ class DataLoader:
             
         if not file_path.exists():
             return pd.DataFrame()
-            
-        return pd.read_parquet(file_path)
+
+        return _read_parquet(str(file_path), file_path.stat().st_mtime, columns)
 
     def load_simulation_results(self, race_id):
         """指定レースのシミュレーション結果(JSON)をロード"""
@@ -113,6 +191,5 @@ class DataLoader:
             return None
             
         # 最新のものを返す
-        latest_file = sorted(files)[-1]
-        with open(latest_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        latest_file = max(files)
+        return read_json(latest_file)
@@ -1,13 +1,8 @@
 import streamlit as st
 import plotly.express as px
-import sys
-from pathlib import Path
 
-# プロジェクトルートをパスに追加
-# 現在のファイル: keibaai/src/ui/pages/X_Page.py
-# 4つ上がプロジェクトルート
-project_root = Path(__file__).resolve().parents[4]
-sys.path.append(str(project_root))
+# プロジェクトルートをパスに追加 (components._paths の import 時に一度だけ行う)
+from components import _paths  # noqa: F401
 
 def main():
     st.title("📊 モデル分析 (Model Analysis)")
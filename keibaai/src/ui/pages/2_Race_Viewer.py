@@ -1,13 +1,8 @@
 import streamlit as st
 import pandas as pd
-import sys
-from pathlib import Path
 
-# プロジェクトルートをパスに追加
-# 現在のファイル: keibaai/src/ui/pages/X_Page.py
-# 4つ上がプロジェクトルート
-project_root = Path(__file__).resolve().parents[4]
-sys.path.append(str(project_root))
+# プロジェクトルートをパスに追加 (components._paths の import 時に一度だけ行う)
+from components import _paths  # noqa: F401
 
 def main():
     st.title("🐎 レース詳細 (Race Viewer)")
@@ -23,42 +18,57 @@ def main():
     year = st.sidebar.selectbox("年", [2024, 2023, 2022, 2021, 2020], index=0)
     
     with st.spinner(f"{year}年のレース情報を読み込んでいます..."):
-        df_races = loader.load_races(year=year)
+        df_races = loader.load_races(
+            year=year,
+            columns=('race_id', 'race_date', 'race_name', 'venue', 'distance_m', 'track_surface')
+        )
         
     if df_races.empty:
         st.error("レース情報の読み込みに失敗しました。")
         return
         
-    # 日付選択
-    dates = sorted(df_races['race_date'].dt.strftime('%Y-%m-%d').unique(), reverse=True)
+    # 日付選択 (文字列化は全行ではなくユニークな日付だけに行う)
+    race_days = df_races['race_date'].dt.normalize().unique()
+    dates = [d.strftime('%Y-%m-%d') for d in sorted(race_days, reverse=True)]
     selected_date = st.sidebar.selectbox("日付", dates)
     
     # 予測データのロード
     with st.spinner(f"{selected_date} の予測データを読み込んでいます..."):
-        df_pred = loader.load_predictions(selected_date, selected_model)
+        df_pred = loader.load_predictions(
+            selected_date, selected_model,
+            columns=('race_id', 'horse_number', 'mu', 'sigma', 'nu', 'win_odds')
+        )
         
     if df_pred.empty:
         st.warning(f"予測データが見つかりません: {selected_date}")
         return
         
     # その日のレース一覧
-    daily_races = df_races[df_races['race_date'].dt.strftime('%Y-%m-%d') == selected_date]
+    # 日付はTimestamp同士で比較し、行ごとの文字列化を避ける
+    daily_races = df_races[df_races['race_date'].dt.normalize() == pd.Timestamp(selected_date)]
     race_ids = sorted(daily_races['race_id'].unique())
+
+    # 選択肢ごとにDataFrameを絞り込まないよう、表示ラベルを一度に作成
+    first_rows = daily_races.drop_duplicates('race_id')
+    race_labels = {
+        race_id: f"{race_id} - {race_name} ({venue})"
+        for race_id, race_name, venue in zip(first_rows['race_id'], first_rows['race_name'], first_rows['venue'])
+    }
     
     # レース選択
     selected_race_id = st.sidebar.selectbox(
         "レース選択",
         race_ids,
-        format_func=lambda x: f"{x} - {daily_races[daily_races['race_id']==x]['race_name'].iloc[0]} ({daily_races[daily_races['race_id']==x]['venue'].iloc[0]})"
+        format_func=race_labels.get
     )
     
     # レース詳細表示
-    race_info = daily_races[daily_races['race_id'] == selected_race_id].iloc[0]
+    race_info = first_rows.set_index('race_id').loc[selected_race_id]
     
     # race_idからレース番号を抽出 (末尾2桁と仮定)
     try:
         race_num = int(str(selected_race_id)[-2:])
-    except:
+    except ValueError:
         race_num = "?"
         
     st.subheader(f"{race_info['race_name']} (R{race_num})")
@@ -1,15 +1,43 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import sys
 from pathlib import Path
-import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 
-# プロジェクトルートをパスに追加
-# 現在のファイル: keibaai/src/ui/pages/X_Page.py
-# 4つ上がプロジェクトルート
-project_root = Path(__file__).resolve().parents[4]
-sys.path.append(str(project_root))
+# プロジェクトルートをパスに追加 (components._paths の import 時に一度だけ行う)
+from components import _paths  # noqa: F401
+from components.data_loader import read_json
+
+# ファイル読み込みはI/O待ちが中心のため、スレッドで並列化する
+MAX_READ_WORKERS = 8
+
+def load_backtest_file(file):
+    """
+    シミュレーション結果JSONを1件読み込み、(race_ids, horse_numbers, win_probs) の各リストを返す
+
+    壊れたファイル (JSONでない、想定外の構造、馬番が整数でない等) はスキップしてNoneを返す。
+    """
+    try:
+        data = read_json(file)
+        race_id = data['race_id']
+        win_probs = data.get('win_probs', {})
+        horse_numbers = [int(horse_num) for horse_num in win_probs.keys()]
+        return [race_id] * len(horse_numbers), horse_numbers, list(win_probs.values())
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        logging.debug(f"シミュレーション結果の読み込みをスキップ: {file}", exc_info=True)
+        return None
+
+@st.cache_data(ttl=5, show_spinner=False)
+def list_backtest_files(sim_dir: str, dir_mtime: float):
+    """バックテスト結果JSONの一覧 (ディレクトリのmtimeが変わるまでキャッシュ)"""
+    with os.scandir(sim_dir) as it:
+        names = [
+            entry.name for entry in it
+            if entry.is_file() and 'v2_backtest' in entry.name and entry.name.endswith('.json')
+        ]
+    return [Path(sim_dir) / name for name in sorted(names)]
 
 def main():
     st.title("📈 過去検証 (Backtest Review)")
@@ -22,7 +50,7 @@ def main():
     
     # バックテスト結果のロード
     sim_dir = Path('data/simulations')
-    sim_files = sorted(sim_dir.glob('*v2_backtest*.json'))
+    sim_files = list_backtest_files(str(sim_dir), sim_dir.stat().st_mtime) if sim_dir.is_dir() else []
     
     if not sim_files:
         st.error("バックテスト結果（JSON）が見つかりません。")
@@ -32,24 +60,29 @@ def main():
     
     if st.button("バックテスト結果を読み込んで分析する"):
         with st.spinner("読み込みと分析を実行中..."):
-            all_results = []
-            for file in sim_files[:500]: # パフォーマンスのため制限
-                try:
-                    with open(file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        race_id = data['race_id']
-                        win_probs = data.get('win_probs', {})
-                        
-                        for horse_num, prob in win_probs.items():
-                            all_results.append({
-                                'race_id': race_id,
-                                'horse_number': int(horse_num),
-                                'win_prob': prob
-                            })
-                except:
-                    continue
-            
-            df_sim = pd.DataFrame(all_results)
+            # 行ごとのdictを作らず、カラムごとのリストに直接追加する
+            race_ids, horse_numbers, win_prob_values = [], [], []
+            with ThreadPoolExecutor(max_workers=MAX_READ_WORKERS) as executor:
+                loaded = executor.map(load_backtest_file, sim_files[:500]) # パフォーマンスのため制限
+
+                for result in loaded:
+                    if result is None:
+                        continue
+                    file_race_ids, file_horse_numbers, file_win_probs = result
+
+                    race_ids.extend(file_race_ids)
+                    horse_numbers.extend(file_horse_numbers)
+                    win_prob_values.extend(file_win_probs)
+
+            df_sim = pd.DataFrame({
+                'race_id': race_ids,
+                'horse_number': horse_numbers,
+                'win_prob': win_prob_values
+            })
+
+            if df_sim.empty:
+                st.info("読み込めるシミュレーション結果がありませんでした。")
+                return
             
             # 今回はデモとして、シミュレーションの確率分布のみ表示
             st.subheader("予測勝率の分布 (Predicted Win Probabilities)")
@@ -12,17 +12,24 @@ import pyarrow.dataset as ds
 import pyarrow as pa
 
 
-def save_fetch_metadata(
-    db_conn,
+FETCH_LOG_INSERT_SQL = '''
+INSERT OR REPLACE INTO fetch_log (
+url, file_path, fetched_ts, sha256,
+file_size, fetch_method, http_status, error_message
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def build_fetch_metadata_row(
     url: str,
     file_path: str,
     data: bytes,
     http_status: int,
     fetch_method: str,
     error_message: str = None
-):
+) -> tuple:
     """
-    データ取得のメタデータをSQLiteに保存
+    fetch_log に挿入する1行分の値を作成する
     """
     if data:
         sha256 = hashlib.sha256(data).hexdigest()
@@ -34,19 +41,46 @@ def save_fetch_metadata(
     jst = timezone(timedelta(hours=9))
     fetched_ts = datetime.now(jst).isoformat()
 
-    cursor = db_conn.cursor()
-    cursor.execute('''
-INSERT OR REPLACE INTO fetch_log (
-url, file_path, fetched_ts, sha256,
-file_size, fetch_method, http_status, error_message
-) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-''', (
+    return (
         url, file_path, fetched_ts, sha256,
         file_size, fetch_method, http_status, error_message
-    ))
+    )
+
+
+def save_fetch_metadata(
+    db_conn,
+    url: str,
+    file_path: str,
+    data: bytes,
+    http_status: int,
+    fetch_method: str,
+    error_message: str = None
+):
+    """
+    データ取得のメタデータをSQLiteに保存
+    """
+    row = build_fetch_metadata_row(url, file_path, data, http_status, fetch_method, error_message)
+    cursor = db_conn.cursor()
+    cursor.execute(FETCH_LOG_INSERT_SQL, row)
     db_conn.commit()
 
 
+def save_fetch_metadata_many(db_conn, rows) -> int:
+    """
+    build_fetch_metadata_row で作成した複数行を1トランザクションで保存する
+
+    行ごとにコミットすると書き込みロックの取得と fsync が行数分発生し、
+    並列実行中の他プロセスと 'database is locked' になりやすいため、まとめて書き込む。
+
+    Returns:
+        int: 保存した行数
+    """
+    rows = list(rows)
+    with db_conn:
+        db_conn.executemany(FETCH_LOG_INSERT_SQL, rows)
+    return len(rows)
+
+
 def generate_data_version(data: bytes) -> str:
     """
     データバージョン文字列を生成（互換性のため残す）
@@ -191,7 +225,8 @@ def load_parquet_data_by_date(
         for f in target_files:
             try:
                 dfs.append(pd.read_parquet(f))
-            except: pass
+            except (OSError, pa.ArrowInvalid):
+                logging.debug(f"Parquetファイルの読み込みをスキップ: {f}", exc_info=True)
         df = pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
         
         # PyArrowでフィルタできなかった場合 (文字列型など) のために、Pandasで再度フィルタリング
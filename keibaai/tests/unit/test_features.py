@@ -0,0 +1,69 @@
+import pytest
+import pandas as pd
+import numpy as np
+from keibaai.src.features.advanced_features import AdvancedFeatureEngine
+
+
+@pytest.fixture
+def performance_data():
+    return pd.DataFrame({
+        'horse_id': ['h1'] * 4 + ['h2'],
+        'race_date': pd.to_datetime(['2024-01-01', '2024-03-01', '2024-02-01', '2024-04-01', '2024-01-15']),
+        'finish_position': [5, 1, 3, 2, 4],
+    })
+
+
+def test_performance_trend_features(performance_data):
+    df = pd.DataFrame({'horse_id': ['h1', 'h2', 'h3'], 'race_id': ['r1', 'r1', 'r1']})
+    result = AdvancedFeatureEngine().generate_performance_trend_features(df, performance_data)
+
+    assert len(result) == len(df)
+    h1 = result.loc[result['horse_id'] == 'h1'].iloc[0]
+    # 日付順の直近3走: 3, 1, 2
+    assert h1['avg_finish_last3'] == pytest.approx(2.0)
+    assert h1['win_rate_last3'] == pytest.approx(1 / 3)
+    assert h1['place_rate_last3'] == pytest.approx(2 / 3)
+    # 前半 (1走目: 3) と後半 (最終走: 2) の比較
+    assert h1['improvement_rate_3'] == pytest.approx((3 - 2) / 3)
+    # 直近5走: 全4走
+    assert h1['avg_finish_last5'] == pytest.approx(2.75)
+    assert h1['improvement_rate_5'] == pytest.approx((4.0 - 1.5) / 4.0)
+
+    # 1走のみの馬は改善率なし、成績のない馬は欠損
+    h2 = result.loc[result['horse_id'] == 'h2'].iloc[0]
+    assert h2['avg_finish_last3'] == pytest.approx(4.0)
+    assert np.isnan(h2['improvement_rate_3'])
+    assert result.loc[result['horse_id'] == 'h3', 'avg_finish_last3'].isna().all()
+
+
+def test_relative_metrics():
+    df = pd.DataFrame({
+        'race_id': ['r1', 'r1', 'r1', 'r2'],
+        'finish_time_seconds': [100.0, 101.0, 102.0, 95.0],
+        'last_3f_time': [35.0, 34.5, 36.0, 33.0],
+        'morning_odds': [3.0, 1.5, 3.0, 2.0],
+        'basis_weight': [55.0, 56.0, 57.0, 54.0],
+    })
+    result = AdvancedFeatureEngine().calculate_relative_metrics(df)
+
+    assert result['time_deviation'].iloc[:3].tolist() == pytest.approx([40.0, 50.0, 60.0])
+    # 1頭だけのレースは標準偏差が計算できないため欠損
+    assert np.isnan(result['time_deviation'].iloc[3])
+    assert result['last3f_diff_from_best'].tolist() == pytest.approx([0.5, 0.0, 1.5, 0.0])
+    assert result['odds_rank'].tolist() == [2.0, 1.0, 2.0, 1.0]
+    assert result['weight_diff_from_avg'].tolist() == pytest.approx([-1.0, 0.0, 1.0, 0.0])
+
+
+def test_race_condition_features():
+    df = pd.DataFrame({
+        'head_count': [8, 12, 16, 18],
+        'race_date': ['2024-01-05', '2024-04-01', None, '2024-12-31'],
+        'prize_1st': [999, 1000, np.nan, 2000],
+    })
+    result = AdvancedFeatureEngine().generate_race_condition_features(df)
+
+    assert result['race_season'].tolist()[:2] == ['winter', 'spring']
+    assert pd.isna(result['race_season'].iloc[2])
+    assert result['race_season'].iloc[3] == 'winter'
+    # 賞金欠損は500扱い (low)、境界値は上側の区分に入る
+    assert result['race_importance'].tolist() == ['low', 'medium', 'low', 'high']
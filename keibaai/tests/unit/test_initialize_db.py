@@ -0,0 +1,45 @@
+import sqlite3
+
+import pytest
+from keibaai.scripts.initialize_db import bulk_insert, create_tables
+
+COLUMNS = ['parser_name', 'source_file', 'error_type', 'failed_ts']
+
+
+def _rows(n):
+    return [('race_parser', f'file_{i}.bin', 'ValueError', '2024-01-01T00:00:00+09:00') for i in range(n)]
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    create_tables(conn)
+    yield conn
+    conn.close()
+
+
+def _count(conn):
+    return conn.execute("SELECT COUNT(*) FROM parse_failures").fetchone()[0]
+
+
+def test_bulk_insert_multiple_chunks(conn):
+    # chunk より多い行数を渡しても全行が挿入され、コミットされている
+    assert bulk_insert(conn, 'parse_failures', COLUMNS, iter(_rows(25)), chunk=10) == 25
+    assert not conn.in_transaction
+    assert _count(conn) == 25
+
+
+def test_bulk_insert_inside_open_transaction(conn):
+    # 呼び出し側の暗黙トランザクションが開いていてもエラーにならず、その一部として扱われる
+    conn.execute("INSERT INTO parse_failures (parser_name, source_file, error_type, failed_ts) VALUES ('p', 'f', 'e', 't')")
+    assert conn.in_transaction
+    assert bulk_insert(conn, 'parse_failures', COLUMNS, _rows(5), chunk=2) == 5
+    conn.rollback()
+    assert _count(conn) == 0
+
+
+def test_bulk_insert_rolls_back_on_error(conn):
+    rows = _rows(5) + [(None, 'bad.bin', 'ValueError', 't')]  # parser_name は NOT NULL
+    with pytest.raises(sqlite3.IntegrityError):
+        bulk_insert(conn, 'parse_failures', COLUMNS, rows, chunk=2)
+    assert _count(conn) == 0